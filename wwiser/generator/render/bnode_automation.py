@@ -59,3 +59,6 @@ class AkClipAutomationList(object):
 
     def get(self, track_index):
         return self._cas.get(track_index)
+
+    def get_nodes(self):
+        return self.nclipams or []
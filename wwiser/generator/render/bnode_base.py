@@ -50,6 +50,15 @@ class CAkHircNode(object):
     def _build(self, node):
         self._barf()
 
+    # parser nodes kept by this bnode and its parts (see Builder.release_nodes)
+    def get_nodes(self):
+        nodes = [self.node, self.nsid]
+        nodes.extend(self.fields.get_nodes())
+        for item in (self.props, self.statechunk, self.rtpclist, self.stingerlist, self.fxlist):
+            if item:
+                nodes.extend(item.get_nodes())
+        return nodes
+
     #--------------------------------------------------------------------------
 
     def _read_device(self, ntid):
@@ -86,3 +86,11 @@ class AkFxChunkList(object):
                 continue
             gain += fxc.bfx.fx.gain
         return gain
+
+    def get_nodes(self):
+        nodes = []
+        for fxc in self._fxcs:
+            if not fxc:
+                continue
+            nodes.append(fxc.nid)
+        return nodes
@@ -139,6 +139,11 @@ class CAkEvent(CAkHircNode):
         # no other config
         return
 
+    def get_nodes(self):
+        nodes = super(CAkEvent, self).get_nodes()
+        nodes.extend(self.ntids or [])
+        return nodes
+
 
 class CAkDialogueEvent(CAkHircNode):
     def __init__(self):
@@ -157,6 +162,12 @@ class CAkDialogueEvent(CAkHircNode):
         self.tree = self._make_tree(node)
         return
 
+    def get_nodes(self):
+        nodes = super(CAkDialogueEvent, self).get_nodes()
+        if self.tree:
+            nodes.extend(self.tree.get_nodes())
+        return nodes
+
 
 class CAkAction(CAkHircNode):
     def __init__(self):
@@ -179,6 +190,11 @@ class CAkAction(CAkHircNode):
     def _build_subaction(self, node):
         return
 
+    def get_nodes(self):
+        nodes = super(CAkAction, self).get_nodes()
+        nodes.append(self.ntid)
+        return nodes
+
 
 class CAkActionPlayAndContinue(CAkAction):
     def __init__(self):
@@ -207,6 +223,11 @@ class CAkActionPlay(CAkAction):
         # v26<= don't set bankID, automatically uses current
         self.nbankid = nbankid
 
+    def get_nodes(self):
+        nodes = super(CAkActionPlay, self).get_nodes()
+        nodes.append(self.nbankid)
+        return nodes
+
 class CAkActionPlayEvent(CAkActionPlay): #_CAkActionPlay
     def __init__(self):
         super(CAkActionPlayEvent, self).__init__()
@@ -304,6 +325,14 @@ class CAkSwitchCntr(CAkParameterNode):
             self.gvalue_ntids[gvalue] = (ntids, ngvalue)
         return
 
+    def get_nodes(self):
+        nodes = super(CAkSwitchCntr, self).get_nodes()
+        nodes.append(self.ngname)
+        for ntids, ngvalue in self.gvalue_ntids.values():
+            nodes.extend(ntids)
+            nodes.append(ngvalue)
+        return nodes
+
 
 class CAkRanSeqCntr(CAkParameterNode):
     def __init__(self):
@@ -365,6 +394,11 @@ class CAkRanSeqCntr(CAkParameterNode):
         self.fields.props([nmode, nrandom, nloop, ncontinuous, navoidrepeat])
         return
 
+    def get_nodes(self):
+        nodes = super(CAkRanSeqCntr, self).get_nodes()
+        nodes.extend(self.ntids)
+        return nodes
+
 
 class CAkLayerCntr(CAkParameterNode):
     def __init__(self):
@@ -395,6 +429,13 @@ class CAkLayerCntr(CAkParameterNode):
             self.fields.prop(nmode)
         return
 
+    def get_nodes(self):
+        nodes = super(CAkLayerCntr, self).get_nodes()
+        nodes.extend(self.ntids)
+        if self.layer_rtpclist:
+            nodes.extend(self.layer_rtpclist.get_nodes())
+        return nodes
+
 
 class CAkSound(CAkParameterNode):
     def __init__(self):
@@ -422,6 +463,11 @@ class CAkSound(CAkParameterNode):
             self.fields.prop(source.nfileid)
         return
 
+    def get_nodes(self):
+        nodes = super(CAkSound, self).get_nodes()
+        nodes.extend(self.sound.get_nodes())
+        return nodes
+
 #******************************************************************************
 # INTERACTIVE MUSIC HIERARCHY
 
@@ -459,6 +505,16 @@ class CAkMusicSwitchCntr(CAkParameterNode):
                 gvalue = ngvalue.value()
                 self.gvalue_ntid[gvalue] = (ntid, ngvalue)
 
+    def get_nodes(self):
+        nodes = super(CAkMusicSwitchCntr, self).get_nodes()
+        nodes.append(self.ngname)
+        for ntid, ngvalue in self.gvalue_ntid.values():
+            nodes.extend([ntid, ngvalue])
+        for item in (self.rules, self.tree):
+            if item:
+                nodes.extend(item.get_nodes())
+        return nodes
+
 
 class CAkMusicRanSeqCntr(CAkParameterNode):
     def __init__(self):
@@ -525,6 +581,13 @@ class CAkMusicRanSeqCntr(CAkParameterNode):
             self._build_playlist(node, nsubplaylist, item.items)
         return
 
+    def get_nodes(self):
+        nodes = super(CAkMusicRanSeqCntr, self).get_nodes()
+        nodes.extend(self.rules.get_nodes())
+        for item in self.items:
+            nodes.extend(item.get_nodes())
+        return nodes
+
 class AkMusicRanSeqPlaylistItem(object):
     def __init__(self):
         self.nitem = None
@@ -534,6 +597,13 @@ class AkMusicRanSeqPlaylistItem(object):
         self.fields = wtxtp_fields.TxtpFields()
         self.items = []
 
+    def get_nodes(self):
+        nodes = [self.nitem, self.ntid]
+        nodes.extend(self.fields.get_nodes())
+        for item in self.items:
+            nodes.extend(item.get_nodes())
+        return nodes
+
 
 class CAkMusicSegment(CAkParameterNode):
     def __init__(self):
@@ -577,6 +647,13 @@ class CAkMusicSegment(CAkParameterNode):
             self.sound = sound
         return
 
+    def get_nodes(self):
+        nodes = super(CAkMusicSegment, self).get_nodes()
+        nodes.extend(self.ntids)
+        if self.sound:
+            nodes.extend(self.sound.get_nodes())
+        return nodes
+
 
 class CAkMusicTrack(CAkParameterNode):
     def __init__(self):
@@ -705,6 +782,20 @@ class CAkMusicTrack(CAkParameterNode):
         self.fields.automations(self.automationlist)
         return
 
+    def get_nodes(self):
+        nodes = super(CAkMusicTrack, self).get_nodes()
+        nodes.append(self.ngname)
+        nodes.extend(self.gvalue_names.values())
+        if self.automationlist:
+            nodes.extend(self.automationlist.get_nodes())
+        nodes.extend(self.silence.get_nodes())
+        for clips in self.subtracks:
+            for clip in clips or []:
+                nodes.extend(clip.get_nodes())
+        for sound in self.unreachables:
+            nodes.extend(sound.get_nodes())
+        return nodes
+
     def _build_silence(self):
         # for (rare) cases that no track is defined
         sound = hnode_misc.NodeSound()
@@ -766,3 +857,9 @@ class CAkMusicTrack_Clip(object):
         self.sound = hnode_misc.NodeSound()
         self.sound.clip = True
         self.fields = wtxtp_fields.TxtpFields()
+
+    def get_nodes(self):
+        nodes = [self.nitem, self.ntid, self.neid]
+        nodes.extend(self.sound.get_nodes())
+        nodes.extend(self.fields.get_nodes())
+        return nodes
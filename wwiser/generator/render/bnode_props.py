@@ -99,6 +99,13 @@ class CAkProps(object):
 
         return frozenset(values) #otherwise unhashable
 
+    # parser nodes used for printing (see Builder.release_nodes)
+    def get_nodes(self):
+        nodes = list(self.fields_fld)
+        for item in self.fields_std + self.fields_rng:
+            nodes.extend(item)
+        return nodes
+
     def _build(self, node):
         # props are a list of values or ranged values.
         # newer wwise use 2 lists (both should exist even if empty), while
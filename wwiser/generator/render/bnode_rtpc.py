@@ -427,6 +427,12 @@ class AkRtpcList(object):
     def get_rtpcs(self):
         return self._rtpcs
 
+    def get_nodes(self):
+        nodes = []
+        for rtpc in self._rtpcs:
+            nodes.extend([rtpc.nid, rtpc.nparam])
+        return nodes
+
     def get_usable_rtpcs(self, apply_bus):
         if self._usables is None:
             items = []
@@ -152,3 +152,10 @@ class AkTransitionRules(object):
 
     def get_rules(self):
         return self._rules
+
+    def get_nodes(self):
+        nodes = []
+        for rule in self._rules:
+            if rule.rtrn:
+                nodes.append(rule.rtrn.ntid)
+        return nodes
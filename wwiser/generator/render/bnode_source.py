@@ -174,6 +174,9 @@ class AkBankSourceData(object):
         else:
             self.extension_alt = self.extension
 
+    def get_nodes(self):
+        return [self.nsrc, self.nplugin, self.nstreamtype, self.nsourceid, self.nfileid, self.nlang]
+
     #  language subdir or nothing if source doesn't depend on language
     def lang_fullname(self):
         if not self._lang_loaded:
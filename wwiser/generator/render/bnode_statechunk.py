@@ -104,6 +104,13 @@ class AkStateChunk(object):
     def get_states(self):
         return self._states
 
+    def get_nodes(self):
+        nodes = []
+        for bsi in self._states:
+            nodes.extend([bsi.nstategroupid, bsi.nstatevalueid])
+            nodes.extend(bsi.props.get_nodes())
+        return nodes
+
     # states with properties that wwiser/vgmstream can handle (ignores stuff like auxs)
     def get_usable_states(self, apply_bus):
         if self._usables is None:
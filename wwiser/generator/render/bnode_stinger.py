@@ -30,3 +30,9 @@ class CAkStingerList(object):
             stinger = CAkStinger(nstinger)
             if stinger.tid:
                 self.stingers.append(stinger)
+
+    def get_nodes(self):
+        nodes = []
+        for stinger in self.stingers:
+            nodes.extend([stinger.ntrigger, stinger.ntid])
+        return nodes
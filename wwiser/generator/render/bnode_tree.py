@@ -39,6 +39,7 @@ class AkDecisionTree(object):
         self.args = []
         self.paths = []
         self.tree = {}
+        self.ntid = None
 
         self._build(node)
 
@@ -115,6 +116,20 @@ class AkDecisionTree(object):
                 self._build_tree_nodes(subtree, depth + 1, npnodes, gamesyncs)
         return
 
+    # paths' ntids are the same as tree leaves
+    def get_nodes(self):
+        nodes = [self.ntid]
+        for _, ngname in self.args:
+            nodes.append(ngname)
+        self._get_tree_nodes(self.tree, nodes)
+        return nodes
+
+    def _get_tree_nodes(self, tree, nodes):
+        for ngvalue, ntid, subtree in tree.values():
+            nodes.extend([ngvalue, ntid])
+            if subtree:
+                self._get_tree_nodes(subtree, nodes)
+
     def _build_tree_leaf(self, ntid, ngvalue, gamesyncs):
         # clone list of gamesyncs and final ntid (both lists as an optimization for huge trees)
         path = []
@@ -1,5 +1,8 @@
 import logging
 from . import wbuilder_util
+from ...parser import wmodel
+
+_RELEASE_BATCH = 1000   # nodes built before releasing them (see release_nodes)
 
 # BUILDER
 # Takes the parsed bank nodes and rebuilds them to simpler "builder node" (bnode) objects
@@ -36,6 +39,10 @@ class Builder(object):
         self._used_node = {}                # marks which node_refs has been used
         self._hircname_to_nodes = {}        # registered types > list of nodes
 
+        # bnodes built before use (see release_nodes) are marked as used when first requested
+        self._prebuilds = None              # bnodes built in current release batch
+        self._prebuilt = {}
+
         self._globalsettings = globalsettings
         return
 
@@ -266,6 +273,8 @@ class Builder(object):
         # check is node already in cache
         bnode = self._node_to_bnode.get(id(node))
         if bnode:
+            if self._prebuilt and self._prebuilds is None and self._prebuilt.pop(id(node), False) and mark_used:
+                self._used_node[id(node)] = True
             return bnode
 
         # builder node with a helper class and save to cache
@@ -276,8 +285,44 @@ class Builder(object):
         bnode = bclass()
         bnode.init_builder(self)
         bnode.init_node(node)
+        node.release_index() #mostly searched when building (see -pi)
 
         self._node_to_bnode[id(node)] = bnode
-        if mark_used:
+        if self._prebuilds is not None:
+            self._prebuilds.append(bnode)
+            self._prebuilt[id(node)] = True
+        elif mark_used:
             self._used_node[id(node)] = True #register usage for unused detection
         return bnode
+
+    #--------------------------------------------------------------------------
+
+    # Builds bnodes for all nodes first, then removes parser nodes that bnodes don't use (mainly
+    # fields already read into bnodes), keeping HIRC nodes and their sid to find/name them.
+    # Each bnode lists parser nodes it keeps in get_nodes(), so new attributes must be added there.
+    # Saves lots of memory in big games, but bank trees can't be used for other things after this.
+    # Done in batches so parts are freed while building the rest.
+    def release_nodes(self, nodes):
+        for start in range(0, len(nodes), _RELEASE_BATCH):
+            self._release_batch(nodes[start:start + _RELEASE_BATCH])
+
+    def _release_batch(self, nodes):
+        self._prebuilds = []
+        try:
+            for node in nodes:
+                try:
+                    self._init_bnode(node, mark_used=False)
+                except Exception:
+                    # left as-is, so errors happen when actually used
+                    logging.debug("generator: can't prebuild node %s", node.get_name())
+        finally:
+            bnodes = self._prebuilds
+            self._prebuilds = None
+
+        # new bnodes may include nodes from other batches (parents), released here too
+        items = []
+        used = []
+        for bnode in bnodes:
+            items.append(bnode.node)
+            used.extend(bnode.get_nodes())
+        wmodel.release_nodes(items, used)
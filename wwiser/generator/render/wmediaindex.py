@@ -32,8 +32,7 @@ class MediaIndex(object):
         nsids = nchunk.finds(type='sid')
         for nsid in nsids:
             sid = nsid.value()
-            attrs = nsid.get_parent().get_attrs()
-            index = attrs.get('index')
+            index = nsid.get_parent().get_attr('index')
             if index is not None:
                 self._add_media_index(bankname, sid, index)
         return
@@ -37,3 +37,9 @@ class NodeSound(object):
         self.fbt = 0  #mods beginning (>0=trim, <0=add begin repeat)
         self.fet = 0  #mods end (<0=trim, >0=add end repeat)
         self.fsd = 0  #original file duration (for calcs)
+
+    def get_nodes(self):
+        nodes = [self.nsrc]
+        if self.source:
+            nodes.extend(self.source.get_nodes())
+        return nodes
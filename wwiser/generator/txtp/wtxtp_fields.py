@@ -126,6 +126,28 @@ class TxtpFields(object):
     def sort(self):
         self._fields.sort()
 
+    # parser nodes in fields, printed later
+    def get_nodes(self):
+        nodes = []
+        for field in self._fields:
+            type = field.type
+            items = field.items
+
+            if type == _FIELD_TYPE_PROP:
+                nodes.append(items)
+            elif type in (_FIELD_TYPE_KEYVAL, _FIELD_TYPE_KEYMINMAX):
+                nodes.extend(items)
+            elif type == _FIELD_TYPE_SC:
+                nkey, nval, props = items
+                nodes.extend([nkey, nval])
+                nodes.extend(props.get_nodes())
+            elif type == _FIELD_TYPE_RTPC:
+                nrtpc, nparam, _, _ = items
+                nodes.extend([nrtpc, nparam])
+            elif type in (_FIELD_TYPE_RULES, _FIELD_TYPE_AM):
+                nodes.extend(items.get_nodes())
+        return nodes
+
     def _prop_info(self, nfield):
         attrs = nfield.get_attrs()
 
@@ -40,6 +40,7 @@ class Generator(object):
         self._generate_unused = False       # generate unused after regular txtp
         self._move = False                  # move sources to wem dir
         self._bank_order = False            # use bank order to generate txtp (instead of prioritizing named nodes)
+        self._low_memory = False            # free bank nodes after building (banks can't be reused)
 
         self._default_hircs = self._renderer.get_generated_hircs()
         self._filter.set_default_hircs(self._default_hircs)
@@ -71,6 +72,9 @@ class Generator(object):
             return
         self._move = move
 
+    def set_low_memory(self, flag):
+        self._low_memory = flag
+
     def set_gamesyncs(self, items):
         self._ws.set_gsdefaults(items)
 
@@ -214,6 +218,7 @@ class Generator(object):
         return
 
     def _setup_nodes(self):
+        hirc_nodes = []
 
         # register nodes first since banks can point to each other
         for bank in self._banks:
@@ -280,12 +285,22 @@ class Generator(object):
                         sid = nsid.value()
 
                         self._builder.register_node(bank_id, sid, node)
+                        hirc_nodes.append(node)
 
                         # for nodes that can contain sources save them to move later
                         if self._move:
                             self._mover.add_node(node)
 
         self._move_wems()
+        self._release_nodes(hirc_nodes)
+        return
+
+    def _release_nodes(self, nodes):
+        if not self._low_memory:
+            return
+
+        logging.info("generator: releasing bank nodes")
+        self._builder.release_nodes(nodes)
         return
    
 
@@ -1,9 +1,11 @@
-import logging, re, os, os.path, sys
+import logging, re, os, os.path, sys, array
 from datetime import datetime
 
 from .. import wfnv
-from ..parser import wdefs
+from ..parser import wdefs, wmodel, wcache
 from .wsqlite import SqliteHandler
+from .wnamestore import NameStoreHandler
+from . import wnamestore
 from .wnamerow import NameRow
 from . import wnconfig
 from . import wnamedumper
@@ -33,6 +35,7 @@ class Names(object):
     ONREPEAT_BEST = 4 #compare caps and pick
     EMPTY_BANKTYPE = ''
     EMPTY_BANKLANG = 0
+    LST_BATCH = 50000 #names hashed at once when parsing lists
 
 
     def __init__(self):
@@ -41,7 +44,12 @@ class Names(object):
         self._names = {}
         self._names_fuzzy = {}
         self._db = None
+        self._db_hashnames = {} # id > db hashname or None (cached since many ids are looked up again)
+        self._db_hashnames_fuzzy = {} # same for fuzzy buckets
         self._loaded_wwnames = {}
+        self._cache = None
+        self._lst_items = None # parsed wwnames.txt names and config lines, when saving caches
+        self._lst_variant = None
         self._current_bankpaths = {} #existing banks info, in the form of (bank, localized) = path
         self._missing = {} # [hashtype] = {(bank, localized)} = [ids]
         self._fnv = wfnv.Fnv()
@@ -139,6 +147,27 @@ class Names(object):
 
         ids[id] = True
 
+    # IDs that should have hashnames but don't (same as missing IDs when saving lists)
+    def get_missing_ids(self):
+        conditionals = set()
+        for hashtype in wdefs.fnv_conditionals_origin:
+            for ids in self._missing.get(hashtype, {}).values():
+                conditionals.update(ids)
+        for row in self._names.values():
+            if row.hashtypes and any(x in row.hashtypes for x in wdefs.fnv_conditionals_origin):
+                conditionals.add(row.id)
+
+        missing = set()
+        for hashtype, banks in self._missing.items():
+            if self._cfg.skip_hashtype(hashtype):
+                continue
+            for ids in banks.values():
+                if hashtype in wdefs.fnv_conditionals:
+                    missing.update([id for id in ids if id in conditionals])
+                else:
+                    missing.update(ids)
+        return missing
+
     def _unmark_unused(self, id):
         for hashtype in self._missing.keys():
             for bankkey in self._missing[hashtype].keys():
@@ -185,19 +214,19 @@ class Names(object):
 
         # on db (add to names for easier access and saving list of wwnames)
         # when using db always set extended hash to allow bus names (and maybe guidnames?)
-        row_db = self._db.select_by_id(id)
-        if row_db:
-            row = self._add_name(id, row_db.hashname, source=NameRow.NAME_SOURCE_EXTRA, exhash=True)
+        hashname_db = self._get_db_hashname(id)
+        if hashname_db:
+            row = self._add_name(id, hashname_db, source=NameRow.NAME_SOURCE_EXTRA, exhash=True)
             if row:
                 self._mark_used(row, hashtype, node)
                 return row
 
         # on db with a close ID
-        row_df = None
+        hashname_df = None
         if not self._cfg.disable_fuzzy:
-            row_df = self._db.select_by_id_fuzzy(id)
-        if row_df and row_df.hashname:
-            hashname_uf = self._fnv.unfuzzy_hashname(id, row_df.hashname)
+            hashname_df = self._get_db_hashname_fuzzy(id)
+        if hashname_df:
+            hashname_uf = self._fnv.unfuzzy_hashname(id, hashname_df)
             row = self._add_name(id, hashname_uf, source=NameRow.NAME_SOURCE_EXTRA, exhash=True)
             if row:
                 self._mark_used(row, hashtype, node)
@@ -205,12 +234,29 @@ class Names(object):
 
         return None
 
+    def _get_db_hashname(self, id):
+        if id in self._db_hashnames:
+            return self._db_hashnames[id]
+        row = self._db.select_by_id(id)
+        hashname = row.hashname if row else None
+        self._db_hashnames[id] = hashname
+        return hashname
+
+    def _get_db_hashname_fuzzy(self, id):
+        id_fz = id & 0xFFFFFF00
+        if id_fz in self._db_hashnames_fuzzy:
+            return self._db_hashnames_fuzzy[id_fz]
+        row = self._db.select_by_id_fuzzy(id)
+        hashname = row.hashname if row else None
+        self._db_hashnames_fuzzy[id_fz] = hashname
+        return hashname
+
     # IDs come from hashed NAME (32b, where name follows rules) or hashed GUIDs (30b, where NAME is arbitrary),
     # so first we check the type. Sometimes IDs that should come from GUID (like BUS names, according to
     # AK's docs) are actually from NAMEs, so it's worth manually testing rather than trusting the caller.
     # Multiple GUIDNAMEs for an ID are possible, so we can update the results, and we can also add Wwise's
     # "Path/ObjectPath" for extra info (never hashnames, considered separate).
-    def _add_name(self, id, name, objpath=None, path=None, onrepeat=ONREPEAT_NOCAPS, exhash=False, source=None):
+    def _add_name(self, id, name, objpath=None, path=None, onrepeat=ONREPEAT_NOCAPS, exhash=False, source=None, id_hash=None):
         if name:
             name = name.strip()
         if objpath:
@@ -229,7 +275,8 @@ class Names(object):
 
         if not id and not hashable:
             return None
-        id_hash = self._fnv.get_hash_lw(lowname)
+        if id_hash is None: #may be pre-hashed in bulk
+            id_hash = self._fnv.get_hash_lw(lowname)
 
         if not id:
             id = id_hash
@@ -237,6 +284,12 @@ class Names(object):
             id = int(id)
         is_hashname = id == id_hash
 
+        if self._lst_items is not None and is_hashname:
+            self._lst_items.append((id, name, extended, onrepeat))
+        return self._add_row(id, name, is_hashname, extended, objpath, path, onrepeat, source)
+
+    # adds an already hashed name
+    def _add_row(self, id, name, is_hashname, extended, objpath, path, onrepeat, source):
         is_update_name = True
         row = self._names.get(id)
         if row:
@@ -302,14 +355,7 @@ class Names(object):
         for bank in banks:
             bankname = bank.get_root().get_bankname()
             bankpath = bank.get_root().get_path()
-
-            self._add_name(None, bankname, source=NameRow.NAME_SOURCE_EXTRA)
-            if bankpath:
-                # just in case add paths (generally only useful in UE4 event-based banks though)
-                splitter = '\\' if '\\' in bankpath else '/'
-                items = bankpath.split(splitter)
-                for item in items:
-                    self._add_name(None, item, source=NameRow.NAME_SOURCE_EXTRA)
+            self._add_bankname(bankname, bankpath)
 
             # might as well register now
             self._register_classify_bank(bank)
@@ -371,13 +417,30 @@ class Names(object):
 
         # automatically from program folder, only one db3 is allowed
         self.parse_db(db)
+        self.prefetch_db(banks)
 
         self.set_bankname(None)
 
         logging.info("names: done")
 
 
-    def _parse_base(self, filename, callback, reverse_encoding=False):
+    def _add_bankname(self, bankname, bankpath):
+        self._add_name(None, bankname, source=NameRow.NAME_SOURCE_EXTRA)
+        if bankpath:
+            # just in case add paths (generally only useful in UE4 event-based banks though)
+            splitter = '\\' if '\\' in bankpath else '/'
+            items = bankpath.split(splitter)
+            for item in items:
+                self._add_name(None, item, source=NameRow.NAME_SOURCE_EXTRA)
+
+    # same as banks' names in parse_files, for banks that aren't parsed yet
+    def add_banknames(self, filenames):
+        for filename in filenames:
+            bankname = os.path.splitext(os.path.basename(filename))[0]
+            bankpath = os.path.dirname(filename)
+            self._add_bankname(bankname, bankpath)
+
+    def _parse_base(self, filename, callback, reverse_encoding=False, cache=False):
         encodings = ['utf-8-sig', 'iso-8859-1']
         if reverse_encoding:
             encodings.reverse()
@@ -392,10 +455,18 @@ class Names(object):
                 return
             logging.info("names: loading " + filename)
 
+            cache = cache and self._cache
+            if cache and self._load_lst_cache(filename):
+                self._loaded_wwnames[testpath] = True
+                return
+
             #try encodings until one works
             done = False
             for encoding in encodings:
                 try:
+                    if cache:
+                        self._lst_items = []
+                        self._lst_variant = self._cfg.repeats_update_caps
                     with open(filename, 'r', encoding=encoding) as infile:
                         callback(infile)
                         done = True
@@ -406,9 +477,13 @@ class Names(object):
 
             if not done:
                 logging.info("names: error reading file %s (change encoding?)", filename)
+            elif cache:
+                self._save_lst_cache(filename)
 
         except Exception as e:
             logging.error("names: error reading name file " + filename, e)
+        finally:
+            self._lst_items = None
         # save even on error to avoid re-reading the same wrong file
         self._loaded_wwnames[testpath] = True
 
@@ -712,11 +787,13 @@ class Names(object):
     def parse_lst(self, filename=None):
         if not filename:
             filename = self._make_filepath('wwnames.txt')
-        self._parse_base(filename, self._parse_lst)
+        self._parse_base(filename, self._parse_lst, cache=True)
 
     def _parse_lst(self, infile):
         # list of processed names to quickly skips repeats
         processed = {}
+        # names to add, hashed in bulk (same order as found)
+        pending = []
 
         # catch: "name(thing) = id" (ex. "8bit", "English(US)", "3D-Submix_Bus")
         pattern_1 = re.compile(r"^[\t]*([a-zA-Z_0-9][a-zA-Z0-9_()\- ]*)( = )([0-9]+)[ ]*$")
@@ -734,7 +811,10 @@ class Names(object):
                 continue
             if line[0] == '#':
                 if line.startswith('#@'): # special flags
+                    self._parse_lst_flush(pending)
                     self._cfg.add_config(line)
+                    if self._lst_items is not None:
+                        self._lst_items.append((None, line, False, None))
                 continue
 
             match = pattern_1.match(line)
@@ -746,7 +826,7 @@ class Names(object):
                 #special meaning of "extended hash" (for objects like buses)
                 if id == '0':
                     processed[name] = True
-                    self._add_name(None, name, exhash=True, source=NameRow.NAME_SOURCE_EXTRA)
+                    pending.append((name, Names.ONREPEAT_NOCAPS, True))
                     continue
 
             #match = pattern_2.match(line)
@@ -766,11 +846,24 @@ class Names(object):
             for elem in elems:
                 #if pattern_s2.match(elem):
                 #    continue
-                self._parse_lst_elem(elem, processed)
+                self._parse_lst_elem(elem, processed, pending)
+
+            if len(pending) >= self.LST_BATCH:
+                self._parse_lst_flush(pending)
 
+        self._parse_lst_flush(pending)
         return
 
-    def _parse_lst_elem(self, elem, processed):
+    def _parse_lst_flush(self, pending):
+        if not pending:
+            return
+        lownames = [name.strip().lower() for name, _, _ in pending]
+        hashes = self._fnv.get_hashes_lw(lownames)
+        for (name, onrepeat, exhash), id_hash in zip(pending, hashes):
+            self._add_name(None, name, exhash=exhash, source=NameRow.NAME_SOURCE_EXTRA, onrepeat=onrepeat, id_hash=id_hash)
+        pending.clear()
+
+    def _parse_lst_elem(self, elem, processed, pending):
         # not hashable
         if not elem or elem[0].isdigit() or len(elem) > 100:
             return
@@ -808,7 +901,7 @@ class Names(object):
                 for i in rng:
                     elem_fmt = elem % (i)
 
-                    self._parse_lst_elem_add(elem_fmt, processed)
+                    self._parse_lst_elem_add(elem_fmt, processed, pending)
             except (ValueError, IndexError):
                 pass #meh
             return
@@ -816,18 +909,18 @@ class Names(object):
         # some odd game has names ending with _ but shouldn't
         if elem.endswith("_"):
             elem_cut = elem[:-1]
-            self._parse_lst_elem_add(elem_cut, processed)
+            self._parse_lst_elem_add(elem_cut, processed, pending)
 
         # it's common to use vars that start with _ but maybe will get a few extra names
         if elem.startswith("_"):
             elem_cut = elem[1:]
-            self._parse_lst_elem_add(elem_cut, processed)
+            self._parse_lst_elem_add(elem_cut, processed, pending)
 
         # default
-        self._parse_lst_elem_add(elem, processed)
+        self._parse_lst_elem_add(elem, processed, pending)
         return
 
-    def _parse_lst_elem_add(self, elem, processed):
+    def _parse_lst_elem_add(self, elem, processed, pending):
         if elem in processed:
             return
         processed[elem] = True
@@ -835,8 +928,47 @@ class Names(object):
         onrepeat = Names.ONREPEAT_NOCAPS
         if self._cfg.repeats_update_caps:
             onrepeat = Names.ONREPEAT_UPDATECAPS
-        self._add_name(None, elem, source=NameRow.NAME_SOURCE_EXTRA, onrepeat=onrepeat)
-
+        pending.append((elem, onrepeat, False))
+
+
+    # Parsed lists are saved as (config lines, ids, names, flags) with the same BankCache as banks
+    # (keyed by path/size/mtime), then re-added in the same order without splitting and hashing again.
+    # Names with update caps depend on config when starting the list, so it's part of the key.
+    def _load_lst_cache(self, filename):
+        item = self._cache.load(filename, self._cfg.repeats_update_caps)
+        if not item:
+            return False
+        configs, ids, names, flags = item
+
+        ids = array.array('I', ids)
+        names = names.split('\n') if names else []
+        configs.append((len(ids), None))
+        source = NameRow.NAME_SOURCE_EXTRA
+        start = 0
+        for end, line in configs:
+            for index in range(start, end):
+                flag = flags[index]
+                onrepeat = Names.ONREPEAT_UPDATECAPS if flag & 2 else Names.ONREPEAT_NOCAPS
+                self._add_row(ids[index], names[index], True, bool(flag & 1), None, None, onrepeat, source)
+            if line:
+                self._cfg.add_config(line)
+            start = end
+        return True
+
+    def _save_lst_cache(self, filename):
+        configs = []
+        ids = array.array('I')
+        names = []
+        flags = bytearray()
+        for id, name, extended, onrepeat in self._lst_items:
+            if id is None:
+                configs.append((len(ids), name))
+                continue
+            ids.append(id)
+            names.append(name)
+            flags.append(int(extended) | (2 if onrepeat == Names.ONREPEAT_UPDATECAPS else 0))
+        item = (configs, ids.tobytes(), '\n'.join(names), bytes(flags))
+        self._cache.save(filename, item, self._lst_variant)
 
     # wwnames.db3
     #
@@ -845,6 +977,8 @@ class Names(object):
     # Since a parser may load banks from multiple locations (base, langs, etc) other companion files
     # are read from those paths and added to this class' name list, but this DB is pre-generated and left
     # loaded to be used as-is for all banks so it only makes sense to load once from a single place
+    #
+    # A compiled wwnames.wwstore (see save_store) is used instead when set, or when found and up to date.
     def parse_db(self, filename=None):
         #if filename is None:
         #    filename = 'wwnames.db3' #work dir
@@ -852,9 +986,44 @@ class Names(object):
         #don't reload DB
         if self._db:
             return
+
+        if not filename or filename.lower().endswith(wnamestore.STORE_EXT):
+            self._db = NameStoreHandler()
+            self._db.open(filename)
+            if self._db.is_open() or filename:
+                return
+
         self._db = SqliteHandler()
         self._db.open(filename)
 
+    # Finds all sid/tid in banks at once, so get_namerow doesn't need to query the DB one by one
+    # (slow with big DBs). IDs already in name lists never reach the DB and are skipped.
+    def prefetch_db(self, banks):
+        if not self._db or not self._db.is_open() or not banks:
+            return
+
+        ids = set()
+        for bank in banks:
+            ids.update(bank.get_root().get_field_values((wmodel.TYPE_SID, wmodel.TYPE_TID)))
+        ids.discard(0)
+        ids.discard(-1)
+        ids.difference_update(self._names)
+        ids.difference_update(self._db_hashnames)
+        if not ids:
+            return
+        logging.info("names: prefetching %i ids from db", len(ids))
+
+        hashnames = self._db.select_by_ids(ids)
+        for id in ids:
+            self._db_hashnames[id] = hashnames.get(id)
+
+        if self._cfg.disable_fuzzy:
+            return
+        hashnames = self._db.select_by_ids_fuzzy(ids)
+        for id in ids:
+            id_fz = id & 0xFFFFFF00
+            self._db_hashnames_fuzzy[id_fz] = hashnames.get(id_fz)
+
     def close(self):
         if self._db:
             self._db.close()
@@ -872,15 +1041,45 @@ class Names(object):
 
         save_all = True
         save_companion = True
-        if not self._db or not self._db.is_open():
-            #force creation of BD if didn't exist
-            #self._db.close() #not needed?
+        if not isinstance(self._db, SqliteHandler) or not self._db.is_open():
+            #force creation of BD if didn't exist (stores are read-only)
+            if self._db:
+                self._db.close()
             self._db = SqliteHandler()
             self._db.open(None, preinit=True)
 
         self._db.save(self._names.values(), save_all=save_all, save_companion=save_companion)
 
 
+    # compiles a wwnames.db3 or wwnames.txt into a wwnames.wwstore next to it (or outname)
+    def save_store(self, filename, outname=None):
+        if not outname:
+            outname = os.path.join(os.path.dirname(filename), 'wwnames' + wnamestore.STORE_EXT)
+        if not os.path.isfile(filename):
+            logging.info("names: couldn't find %s name file", filename)
+            return
+
+        if filename.lower().endswith('.db3'):
+            db = SqliteHandler()
+            db.open(filename)
+            try:
+                count = wnamestore.save_store(outname, db.select_all())
+            finally:
+                db.close()
+        else:
+            self._parse_base(filename, self._parse_lst)
+            items = [(row.id, row.hashname) for row in self._names.values() if row.hashname]
+            count = wnamestore.save_store(outname, items)
+
+        logging.info("names: saved %i names to %s", count, outname)
+
+    # saves/loads parsed wwnames.txt to/from dir (or next to lists if not set)
+    def set_cache(self, flag, path=None):
+        if not flag:
+            self._cache = None
+            return
+        self._cache = wcache.BankCache(path)
+
     # banks could come from different paths
     def set_bankname(self, bankname):
         self._bankname = bankname
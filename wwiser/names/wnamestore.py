@@ -0,0 +1,209 @@
+import logging, os, os.path, sys, array, bisect, mmap, struct
+from .wnamerow import NameRow
+
+# wwnames.wwstore name store
+# Same use as wwnames.db3 (id > hashname lookups) but compiled into a sorted binary file that is
+# memory-mapped rather than read, so it loads instantly even with millions of names, and pages are
+# shared between processes. Made from a .db3 or wwnames.txt (see Names.save_store), read-only.
+#
+# Format (little endian):
+# - header: "WWNS", version, count, reserved
+# - ids: count * uint32 (sorted)
+# - offsets: (count + 1) * uint32 (name N is blob[offsets[N] : offsets[N+1]])
+# - blob: utf-8 names
+
+STORE_EXT = '.wwstore'
+STORE_MAGIC = b'WWNS'
+STORE_VERSION = 1
+STORE_HEADER = struct.Struct('<4sIII')
+
+
+class NameStoreHandler(object):
+
+    def __init__(self):
+        self._file = None
+        self._mm = None
+        self._ids = None
+        self._offsets = None
+        self._blob = None
+        self._count = 0
+
+    def is_open(self):
+        return self._mm is not None
+
+    # opens a store, or wwnames.wwstore in work/program dir when not set (ignored if older than a
+    # .db3 next to it, since it was probably compiled before the db was updated)
+    def open(self, filename=None):
+        auto = not filename
+        if auto:
+            filename = 'wwnames' + STORE_EXT
+
+        basepath = filename
+        workpath = os.path.join(os.path.dirname(sys.argv[0]), filename)
+        if os.path.isfile(basepath):
+            path = basepath
+        elif os.path.isfile(workpath):
+            path = workpath
+        else:
+            if not auto:
+                logging.info("names: couldn't find %s name file", filename)
+            return
+
+        if auto:
+            dbpath = os.path.join(os.path.dirname(path), 'wwnames.db3')
+            if os.path.isfile(dbpath) and os.path.getmtime(dbpath) > os.path.getmtime(path):
+                logging.info("names: ignoring %s (older than %s)", path, dbpath)
+                return
+
+        logging.info("names: loading %s", path)
+        try:
+            self._open(path)
+        except (OSError, ValueError) as e:
+            logging.info("names: ignoring bad store %s (%s)", path, e)
+            self.close()
+
+    def _open(self, path):
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < STORE_HEADER.size:
+            raise ValueError("file too small")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, _ = STORE_HEADER.unpack_from(self._mm, 0)
+        if magic != STORE_MAGIC or version != STORE_VERSION:
+            raise ValueError("unknown format")
+
+        ids_start = STORE_HEADER.size
+        offsets_start = ids_start + count * 4
+        blob_start = offsets_start + (count + 1) * 4
+        if blob_start > size:
+            raise ValueError("truncated file")
+
+        self._count = count
+        self._ids = self._get_array(ids_start, offsets_start)
+        self._offsets = self._get_array(offsets_start, blob_start)
+        self._blob = memoryview(self._mm)[blob_start:]
+        if self._offsets[count] > len(self._blob):
+            raise ValueError("truncated file")
+
+    # direct view of mapped data when possible, otherwise a copy (big endian machines)
+    def _get_array(self, start, end):
+        view = memoryview(self._mm)[start:end]
+        if sys.byteorder == 'little':
+            return view.cast('I')
+        items = array.array('I', view)
+        items.byteswap()
+        view.release()
+        return items
+
+    def close(self):
+        # views must be released before unmapping
+        for view in (self._ids, self._offsets, self._blob):
+            if isinstance(view, memoryview):
+                view.release()
+        self._ids = None
+        self._offsets = None
+        self._blob = None
+        self._count = 0
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    # index of first id >= given id
+    def _find(self, id):
+        return bisect.bisect_left(self._ids, id, 0, self._count)
+
+    def _get_name(self, index):
+        start = self._offsets[index]
+        end = self._offsets[index + 1]
+        return str(self._blob[start:end], 'utf-8')
+
+    def _get_hashname(self, id):
+        if id < 0 or id > 0xFFFFFFFF:
+            return None
+        index = self._find(id)
+        if index < self._count and self._ids[index] == id:
+            return self._get_name(index)
+        return None
+
+    # lowest id in the fuzzy bucket, like wwnames.db3
+    def _get_hashname_fuzzy(self, id):
+        if id < 0 or id > 0xFFFFFFFF:
+            return None
+        id = id & 0xFFFFFF00
+        index = self._find(id)
+        if index < self._count and self._ids[index] < id + 256:
+            return self._get_name(index)
+        return None
+
+    def select_by_id(self, id):
+        if not self.is_open():
+            return None
+        name = self._get_hashname(id)
+        if name is None:
+            return None
+        return NameRow(id, hashname=name)
+
+    def select_by_id_fuzzy(self, id):
+        if not self.is_open():
+            return None
+        name = self._get_hashname_fuzzy(id)
+        if name is None:
+            return None
+        return NameRow(self._ids[self._find(id & 0xFFFFFF00)], hashname=name)
+
+    # same as SqliteHandler, returns a dict of id > name for found ones
+    def select_by_ids(self, ids):
+        results = {}
+        if not self.is_open():
+            return results
+        for id in ids:
+            name = self._get_hashname(id)
+            if name is not None:
+                results[id] = name
+        return results
+
+    def select_by_ids_fuzzy(self, ids):
+        results = {}
+        if not self.is_open():
+            return results
+        for id in set([id & 0xFFFFFF00 for id in ids]):
+            name = self._get_hashname_fuzzy(id)
+            if name is not None:
+                results[id] = name
+        return results
+
+
+# writes a store from (id, name) items (repeated ids keep the first name)
+def save_store(filename, items):
+    names = {}
+    for id, name in items:
+        if id is None or id < 0 or id > 0xFFFFFFFF or not name or id in names:
+            continue
+        names[id] = name
+
+    ids = array.array('I', sorted(names))
+    offsets = array.array('I')
+    blob = bytearray()
+    for id in ids:
+        offsets.append(len(blob))
+        blob += names[id].encode('utf-8')
+    offsets.append(len(blob))
+    if len(blob) > 0xFFFFFFFF:
+        raise ValueError("too many names")
+
+    if sys.byteorder != 'little':
+        ids.byteswap()
+        offsets.byteswap()
+
+    temp = filename + '.tmp'
+    with open(temp, 'wb') as outfile:
+        outfile.write(STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION, len(ids), 0))
+        outfile.write(ids.tobytes())
+        outfile.write(offsets.tobytes())
+        outfile.write(blob)
+    os.replace(temp, filename)
+    return len(ids)
@@ -106,6 +106,46 @@ class SqliteHandler(object):
             return self._to_namerow(row)
         return None
 
+    # Finds many ids at once (much faster than one query per id with big DBs), returning a dict
+    # of id > name for found ones. Uses a temp table to join ids, or fuzzy buckets (see below),
+    # where the first (lowest) id per bucket is used.
+    def select_by_ids(self, ids):
+        return self._select_prefetch(ids,
+            "SELECT names.id, names.name FROM prefetch JOIN names ON names.id = prefetch.id")
+
+    def select_by_ids_fuzzy(self, ids):
+        buckets = set([id & 0xFFFFFF00 for id in ids])
+        return self._select_prefetch(buckets,
+            "SELECT prefetch.id, MIN(names.id), names.name FROM prefetch JOIN names "
+            "ON names.id >= prefetch.id AND names.id < prefetch.id + 256 GROUP BY prefetch.id")
+
+    def _select_prefetch(self, ids, query):
+        results = {}
+        if not self._cx or not ids:
+            return results
+        cx = self._cx
+        cur = cx.cursor()
+
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS prefetch(id integer PRIMARY KEY)")
+        try:
+            cur.executemany("INSERT OR IGNORE INTO prefetch(id) VALUES(?)", [(id,) for id in ids])
+            cur.execute(query)
+            for row in cur:
+                results[row[0]] = row[-1]
+        finally:
+            cur.execute("DELETE FROM prefetch")
+            cx.commit()
+        return results
+
+    # all rows as (id, name), for compiling name stores
+    def select_all(self):
+        if not self._cx:
+            return
+        cur = self._cx.cursor()
+        cur.execute("SELECT id, name FROM names ORDER BY id")
+        for row in cur:
+            yield row
+
     def select_by_id_fuzzy(self, id):
         if not self._cx:
             return
@@ -0,0 +1,65 @@
+import logging, os, pickle, zlib
+from .. import wversion
+
+
+# Saves parsed banks (as packed wpacker tables) to disk and loads them back instead of parsing again,
+# as long as the bank is the same file (path, size and modified time) and was saved by the same
+# wwiser version. Caches are local files made by wwiser itself, so they are trusted as-is.
+
+CACHE_FORMAT = 3
+CACHE_EXT = '.wwcache'
+
+
+class BankCache(object):
+    def __init__(self, path=None):
+        # caches go next to each bank if not set
+        self._path = path
+
+    def _get_cache_path(self, filename):
+        if not self._path:
+            return filename + CACHE_EXT
+
+        # different dirs may have banks with the same name
+        fullpath = os.path.abspath(filename)
+        pathkey = zlib.crc32(fullpath.encode('utf-8'))
+        basename = os.path.basename(filename)
+        return os.path.join(self._path, '%s-%08x%s' % (basename, pathkey, CACHE_EXT))
+
+    def _get_key(self, filename, variant):
+        st = os.stat(filename)
+        # filename is saved in the bank as passed, so must match too
+        return (CACHE_FORMAT, wversion.WWISER_VERSION, filename, os.path.abspath(filename), st.st_size, st.st_mtime_ns, variant)
+
+    # returns saved (packed data, sid, lang, size) or None if missing/outdated
+    # (variant is anything else that changes parsed results, like parse profiles)
+    def load(self, filename, variant=None):
+        path = self._get_cache_path(filename)
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            key = self._get_key(filename, variant)
+            with open(path, 'rb') as infile:
+                cache_key = pickle.load(infile)
+                if cache_key != key:
+                    logging.debug("parser: outdated cache for %s", filename)
+                    return None
+                return pickle.load(infile)
+        except Exception as e:
+            logging.info("parser: ignoring bad cache for %s (%s)", filename, e)
+            return None
+
+    def save(self, filename, item, variant=None):
+        path = self._get_cache_path(filename)
+        temp = path + '.tmp'
+
+        try:
+            key = self._get_key(filename, variant)
+            if self._path:
+                os.makedirs(self._path, exist_ok=True)
+            with open(temp, 'wb') as outfile:
+                pickle.dump(key, outfile, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(item, outfile, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, path)
+        except OSError as e:
+            logging.info("parser: can't save cache for %s (%s)", filename, e)
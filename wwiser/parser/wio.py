@@ -1,4 +1,14 @@
-import os, struct
+import os, struct, mmap
+
+
+# decrypts the part of data covered by the xorpad in one go, as a big int xor rather than per byte
+def unxor(data, xorpad):
+    size = min(len(xorpad), len(data))
+    if not size:
+        return None
+    elem = int.from_bytes(data[0:size], 'big') ^ int.from_bytes(xorpad[0:size], 'big')
+    return elem.to_bytes(size, 'big')
+
 
 class FileReader(object):
 
@@ -6,11 +16,20 @@ class FileReader(object):
         self.file = file
         self.be = False
         self._xorpad = None
+        self._xorbuf = None
+        self._name = file.name
 
         file.seek(0, os.SEEK_END)
         self.size = file.tell()
         file.seek(0, os.SEEK_SET)
 
+    # when moved to another process (nodes keep a ref) only basic info is kept, as
+    # reading is done by then
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['file'] = None
+        return state
+
     #def _read_buf(self, offset, type, size):
     #    elem = self.buf[offset:offset+size]
     #    return struct.unpack(type, elem)[0]
@@ -20,22 +39,31 @@ class FileReader(object):
             raise ReaderError("can't read requested 0x%x bytes at 0x%x" % (size, self.current()))
 
     def __read(self, offset, type, size):
-        if offset is not None:
-            self.file.seek(offset, os.SEEK_SET)
-        elem = self.file.read(size)
-        if self._xorpad:
-            elem = self.__unxor(elem, size)
-
+        elem = self.__get(offset, size)
         self._check(elem, size)
 
         return struct.unpack(type, elem)[0]
 
+    # encrypted part is decrypted once on set_xorpad, rest is read as-is
+    def __get(self, offset, size):
+        if offset is not None:
+            self.file.seek(offset, os.SEEK_SET)
+        if self._xorbuf is None:
+            return self.file.read(size)
+
+        offset = self.file.tell()
+        elem = self.file.read(size)
+        if offset < len(self._xorbuf):
+            clean = self._xorbuf[offset:offset + len(elem)]
+            elem = clean + elem[len(clean):]
+        return elem
+
     def __read_string(self, offset, size):
         if offset is not None:
             self.file.seek(offset, os.SEEK_SET)
         if size == 0:
             return ""
-        elem = self.file.read(size)
+        elem = self.__get(None, size)
         self._check(elem, size)
 
         elem = bytes(elem) #force
@@ -46,30 +74,12 @@ class FileReader(object):
         return text
 
     def __bytes(self, offset, size):
-        if offset is not None:
-            self.file.seek(offset, os.SEEK_SET)
-        elem = self.file.read(size)
+        elem = self.__get(offset, size)
         self._check(elem, size)
 
         elem = bytes(elem) #force
         return elem
 
-    def __unxor(self, elem, size):
-        offset = self.current() - size
-        xorpad_len = len(self._xorpad)
-        if offset >= xorpad_len:
-            return elem
-
-        max = offset + size
-        if max > xorpad_len:
-            max = xorpad_len
-
-        elem = bytearray(elem)
-        for i in range(offset, max):
-            xor = self._xorpad[i]
-            elem[i - offset] ^= xor
-        return elem
-
     def d64le(self, offset = None):
         return self.__read(offset, '<d', 8)
 
@@ -179,6 +189,16 @@ class FileReader(object):
         #as bytes rather than string to avoid failures on bad data
         return self.__bytes(offset, 4)
 
+    # reads count structs of a format (without endianness) in one go, as a list of tuples
+    def records(self, format, count):
+        format = ('>' if self.be else '<') + format
+        size = struct.calcsize(format) * count
+        if not size:
+            return []
+        elem = self.__get(None, size)
+        self._check(elem, size)
+        return list(struct.iter_unpack(format, elem))
+
     def gap(self, bytes):
         offset_before = self.current()
         self.skip(bytes)
@@ -219,13 +239,308 @@ class FileReader(object):
         return self.current() >= self.size
 
     def get_path(self):
-        return os.path.dirname(self.file.name)
+        return os.path.dirname(self._name)
+
+    def get_filename(self):
+        return os.path.basename(self._name)
+
+    def get_xorpad(self):
+        return self._xorpad
+
+    def set_xorpad(self, xorpad):
+        self._xorpad = xorpad
+
+        current = self.file.tell()
+        self.file.seek(0, os.SEEK_SET)
+        data = self.file.read(len(xorpad))
+        self.file.seek(current, os.SEEK_SET)
+        self._xorbuf = unxor(data, xorpad)
+
+    def close(self):
+        # file is handled externally
+        pass
+
+
+# Same API as FileReader, but reads from a memory-mapped view of the file, so each field is a
+# direct unpack at some offset rather than a seek+read syscall (noticeable in big banks).
+class MmapReader(object):
+    _D64LE = struct.Struct('<d')
+    _D64BE = struct.Struct('>d')
+    _F32LE = struct.Struct('<f')
+    _F32BE = struct.Struct('>f')
+    _S64LE = struct.Struct('<q')
+    _S64BE = struct.Struct('>q')
+    _U64LE = struct.Struct('<Q')
+    _U64BE = struct.Struct('>Q')
+    _S32LE = struct.Struct('<i')
+    _S32BE = struct.Struct('>i')
+    _U32LE = struct.Struct('<I')
+    _U32BE = struct.Struct('>I')
+    _S16LE = struct.Struct('<h')
+    _S16BE = struct.Struct('>h')
+    _U16LE = struct.Struct('<H')
+    _U16BE = struct.Struct('>H')
+    _S8 = struct.Struct('b')
+    _U8 = struct.Struct('B')
+
+    def __init__(self, file):
+        self.file = file
+        self.be = False
+        self._xorpad = None
+        self._xorbuf = None
+        self._pos = 0
+        self._name = file.name
+
+        file.seek(0, os.SEEK_END)
+        self.size = file.tell()
+        file.seek(0, os.SEEK_SET)
+
+        # mmap can't map empty files (caller should fall back to FileReader)
+        self.buf = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['file'] = None
+        state['buf'] = None
+        return state
+
+    def close(self):
+        if self.buf is not None:
+            self.buf.close()
+            self.buf = None
+
+    def _check(self, offset, size):
+        if offset < 0 or offset + size > self.size:
+            raise ReaderError("can't read requested 0x%x bytes at 0x%x" % (size, offset))
+
+    def __read(self, offset, st):
+        if offset is None:
+            offset = self._pos
+        size = st.size
+        self._check(offset, size)
+        self._pos = offset + size
+
+        if self._xorbuf is not None and offset < len(self._xorbuf):
+            return st.unpack(self.__get(offset, size))[0]
+        return st.unpack_from(self.buf, offset)[0]
+
+    def __get(self, offset, size):
+        self._check(offset, size)
+        self._pos = offset + size
+
+        # encrypted part is decrypted once on set_xorpad, rest is read as-is
+        if self._xorbuf is not None and offset < len(self._xorbuf):
+            xorbuf_len = len(self._xorbuf)
+            if offset + size <= xorbuf_len:
+                return bytes(self._xorbuf[offset:offset + size])
+            return bytes(self._xorbuf[offset:]) + self.buf[xorbuf_len:offset + size]
+        return self.buf[offset:offset + size]
+
+    def __read_string(self, offset, size):
+        if offset is None:
+            offset = self._pos
+        if size == 0:
+            self._pos = offset
+            return ""
+        elem = self.__get(offset, size)
+
+        #remove c-string null terminator, .decode() retains it
+        if elem[-1] == 0:
+            elem = elem[:-1]
+        text = elem.decode('UTF-8')
+        return text
+
+    def __bytes(self, offset, size):
+        if offset is None:
+            offset = self._pos
+        return self.__get(offset, size)
+
+    def d64le(self, offset = None):
+        return self.__read(offset, self._D64LE)
+
+    def d64be(self, offset = None):
+        return self.__read(offset, self._D64BE)
+
+    def d64(self, offset = None):
+        if self.be:
+            return self.d64be(offset)
+        else:
+            return self.d64le(offset)
+
+    def f32le(self, offset = None):
+        return self.__read(offset, self._F32LE)
+
+    def f32be(self, offset = None):
+        return self.__read(offset, self._F32BE)
+
+    def f32(self, offset = None):
+        if self.be:
+            return self.f32be(offset)
+        else:
+            return self.f32le(offset)
+
+    def s64le(self, offset = None):
+        return self.__read(offset, self._S64LE)
+
+    def s64be(self, offset = None):
+        return self.__read(offset, self._S64BE)
+
+    def u64le(self, offset = None):
+        return self.__read(offset, self._U64LE)
+
+    def u64be(self, offset = None):
+        return self.__read(offset, self._U64BE)
+
+    def s64(self, offset = None):
+        if self.be:
+            return self.s64be(offset)
+        else:
+            return self.s64le(offset)
+
+    def u64(self, offset = None):
+        if self.be:
+            return self.u64be(offset)
+        else:
+            return self.u64le(offset)
+
+    def s32le(self, offset = None):
+        return self.__read(offset, self._S32LE)
+
+    def s32be(self, offset = None):
+        return self.__read(offset, self._S32BE)
+
+    def u32le(self, offset = None):
+        return self.__read(offset, self._U32LE)
+
+    def u32be(self, offset = None):
+        return self.__read(offset, self._U32BE)
+
+    def s32(self, offset = None):
+        if self.be:
+            return self.s32be(offset)
+        else:
+            return self.s32le(offset)
+
+    def u32(self, offset = None):
+        if self.be:
+            return self.u32be(offset)
+        else:
+            return self.u32le(offset)
+
+    def s16le(self, offset = None):
+        return self.__read(offset, self._S16LE)
+
+    def s16be(self, offset = None):
+        return self.__read(offset, self._S16BE)
+
+    def s16(self, offset = None):
+        if self.be:
+            return self.s16be(offset)
+        else:
+            return self.s16le(offset)
+
+    def u16le(self, offset = None):
+        return self.__read(offset, self._U16LE)
+
+    def u16be(self, offset = None):
+        return self.__read(offset, self._U16BE)
+
+    def u16(self, offset = None):
+        if self.be:
+            return self.u16be(offset)
+        else:
+            return self.u16le(offset)
+
+    def s8(self, offset = None):
+        return self.__read(offset, self._S8)
+
+    def u8(self, offset = None):
+        return self.__read(offset, self._U8)
+
+    def str(self, size, offset = None):
+        return self.__read_string(offset, size)
+
+    def fourcc(self, offset = None):
+        #as bytes rather than string to avoid failures on bad data
+        return self.__bytes(offset, 4)
+
+    def records(self, format, count):
+        format = ('>' if self.be else '<') + format
+        size = struct.calcsize(format) * count
+        if not size:
+            return []
+        elem = self.__get(self._pos, size)
+        return list(struct.iter_unpack(format, elem))
+
+    def gap(self, bytes):
+        offset_after = self._pos + bytes
+        if offset_after > self.size or offset_after < 0:
+            raise ReaderError("can't skip requested 0x%x bytes at 0x%x" % (bytes, self.current()))
+        self._pos = offset_after
+
+    def seek(self, offset):
+        self._pos = offset
+
+    def skip(self, bytes):
+        self._pos += bytes
+
+    def current(self):
+        return self._pos
+
+    def get_size(self):
+        return self.size
+
+    def guess_endian32(self, offset):
+        current = self._pos
+        var_le = self.u32le(offset)
+        var_be = self.u32be(offset)
+
+        if var_le > var_be:
+            self.be = True
+        else:
+            self.be = False
+        self._pos = current
+
+    def get_endian_big(self):
+        return self.be
+
+    def set_endian(self, big_endian):
+        self.be = big_endian
+
+    def is_eof(self):
+        return self.current() >= self.size
+
+    def get_path(self):
+        return os.path.dirname(self._name)
 
     def get_filename(self):
-        return os.path.basename(self.file.name)
+        return os.path.basename(self._name)
+
+    def get_xorpad(self):
+        return self._xorpad
 
     def set_xorpad(self, xorpad):
         self._xorpad = xorpad
+        self._xorbuf = unxor(self.buf[0:len(xorpad)], xorpad)
+
+# Same as MmapReader, but with the whole file in memory, for nodes that read data after the
+# file is closed (lazy parsing).
+class MemoryReader(MmapReader):
+
+    def __init__(self, file):
+        self.file = file
+        self.be = False
+        self._xorpad = None
+        self._xorbuf = None
+        self._pos = 0
+        self._name = file.name
+
+        self.buf = file.read()
+        self.size = len(self.buf)
+
+    def close(self):
+        # data is kept as long as nodes need it
+        self.file = None
 
 class ReaderError(Exception):
     def __init__(self, msg):
@@ -1,6 +1,7 @@
-import os
+import os, struct
+from array import array
 from collections import OrderedDict
-from . import wdefs, wfinder
+from . import wdefs, wfinder, wquery
 
 #maybe should be in some enum?
 TYPE_4CC = '4cc'
@@ -22,6 +23,9 @@ TYPE_GAP = 'gap'
 TYPE_STR = 'str'
 TYPE_STZ = 'stz'
 
+# attrs with names of sid/tid fields (see NodeField.get_names)
+NAME_ATTRS = ('hashname', 'guidname', 'path', 'objpath')
+
 TYPES_SIZE = {
     TYPE_D64: 8,
     TYPE_S64: 8,
@@ -63,6 +67,22 @@ TYPES_INFO = {
     TYPE_STR: "string",
     TYPE_STZ: "string (null-terminated)",
 }
+# fixed size types that can be read in records
+RECORD_FORMATS = {
+    TYPE_D64: 'd',
+    TYPE_S64: 'q',
+    TYPE_U64: 'Q',
+    TYPE_S32: 'i',
+    TYPE_U32: 'I',
+    TYPE_F32: 'f',
+    TYPE_SID: 'I',
+    TYPE_TID: 'I',
+    TYPE_UNI: 'I',
+    TYPE_S16: 'h',
+    TYPE_U16: 'H',
+    TYPE_S8: 'b',
+    TYPE_U8: 'B',
+}
 
 
 # base parent class for nodes
@@ -102,7 +122,10 @@ class NodeElement(object):
     # *** external access ***
 
     def get_attrs(self): #generic access to node's attributes
-        return {} #use throw away dicts
+        return OrderedDict(self.get_attr_items()) #use throw away dicts
+
+    def get_attr_items(self): #same as (key, value) pairs, to iterate without making dicts
+        return ()
 
     def get_attr(self, attr): #access to node's attribute (faster than get_attrs)
         return None
@@ -120,12 +143,18 @@ class NodeElement(object):
         #    self._children = [] #lazy init!
         return self._children
 
+    def get_loaded_children(self): #same but doesn't load lazy objects
+        return self._children
+
     def get_root(self):
         return self._root
 
     def get_name(self):
         return None
 
+    def is_loaded(self): #false for lazy objects that haven't read all children yet
+        return True
+
 
     def get_error_count(self):
         return self._error_count
@@ -136,24 +165,81 @@ class NodeElement(object):
     # *** external helpers ***
 
     def find(self, **args):
+        results = self._find_indexed(args, False)
+        if results is not None:
+            if len(results) > 1:
+                raise ValueError("more than 1 result found")
+            return results[0] if results else None
         return wfinder.NodeFinder(**args).find(self)
 
     def find1(self, **args):
+        results = self._find_indexed(args, True)
+        if results is not None:
+            return results[0] if results else None
         return wfinder.NodeFinder(**args).find1(self)
 
     def finds(self, **args):
+        results = self._find_indexed(args, False)
+        if results is not None:
+            return results
         return wfinder.NodeFinder(**args).finds(self)
 
+    # indexed results for simple finds (see wfinder.NodeIndex), if possible
+    def _find_indexed(self, args, first):
+        # unloaded objects may not need to load, when finding fields in the first part
+        if not self._root._indexed or len(args) != 1 or not self.is_loaded():
+            return None
+        key, value = next(iter(args.items()))
+        if key not in ('name', 'type') or not value:
+            return None
+
+        # first level is checked first anyway, and often has the target (like sids)
+        if first:
+            for subnode in self.get_children() or ():
+                if subnode.get_attr(key) == value:
+                    return [subnode]
+
+        unit = self._get_index_unit()
+        if unit is None:
+            return None
+        if unit._finds is None:
+            unit._finds = wfinder.NodeIndex(unit)
+        return unit._finds.find(self, key, value, first)
+
+    # outermost list element with this node (like a HIRC item), indexed as a whole
+    def _get_index_unit(self):
+        unit = None
+        node = self
+        while node._parent is not None:
+            if node.__class__ is NodeObject and node._parent.__class__ is NodeList:
+                unit = node
+            node = node._parent
+        return unit
+
+    # nodes matching a path query (see wquery)
+    def query(self, expr):
+        return wquery.compile(expr).run(self)
+
+    def query1(self, expr):
+        nodes = wquery.compile(expr).run(self)
+        if not nodes:
+            return None
+        return nodes[0]
+
 
 # root node with special definitions (represents a bank)
 class NodeRoot(NodeElement):
-    __slots__ = ['__r', '__filename', '__path', '_version', '_id', '_lang', '_feedback', '_custom', '_subversion', '_names', '_strings']
+    __slots__ = ['__r', '__filename', '__path', '_be', '_version', '_id', '_lang', '_feedback', '_custom', '_subversion', '_names', '_strings', '_lazy', '_fields', '_indexed', '_streamer', '_executor', '_profile', '_profiler']
 
     def __init__(self, r, version=0):
         super(NodeRoot, self).__init__(None, 'root')
         self.__r = r
-        self.__filename = r.get_filename()
-        self.__path = r.get_path()
+        self.__filename = None
+        self.__path = None
+        if r:
+            self.__filename = r.get_filename()
+            self.__path = r.get_path()
+        self._be = False
         self._version = version
 
         self._id = None
@@ -163,17 +249,23 @@ class NodeRoot(NodeElement):
         self._custom = False
         self._names = None
         self._strings = []
+        self._lazy = False
+        self._fields = None
+        self._indexed = False
+        self._streamer = None
+        self._executor = None
+        self._profile = None
+        self._profiler = None
 
 
     # *** inheritance ***
 
-    def get_attrs(self):
-        attrs = OrderedDict([
+    def get_attr_items(self):
+        return (
             ('filename', self.__filename),
             ('path', self.__path),
             ('version', self._version),
-        ])
-        return attrs
+        )
 
     # *** node helpers ***
 
@@ -204,6 +296,11 @@ class NodeRoot(NodeElement):
     def get_path(self):
         return self.__path
 
+    # for trees reused from a bank with the same data elsewhere
+    def set_filename(self, filename):
+        self.__filename = os.path.basename(filename)
+        self.__path = os.path.dirname(filename)
+
     def get_version(self):
         return self._version
 
@@ -243,13 +340,130 @@ class NodeRoot(NodeElement):
     def set_names(self, names):
         self._names = names
 
+    # bank objects that allow it are fully read on first access
+    def set_lazy(self, flag):
+        self._lazy = flag
+
+    def is_lazy(self):
+        return self._lazy
+
+    # moves fields to compact arrays (see FieldStore), objects loaded later are compacted on load
+    def compact(self):
+        if self._fields is None:
+            self._fields = FieldStore()
+        self._fields.compact(self)
+
+    def get_fields(self):
+        return self._fields
+
+    # values of fields with some types (like sid/tid) in loaded parts, without loading lazy
+    # objects or making nodes for records and compact fields
+    def get_field_values(self, types):
+        values = set()
+
+        store = self._fields
+        if store is not None:
+            type_ids = set(store.get_type_ids(types))
+            for type_id, kind, value in zip(store.types, store.kinds, store.values):
+                if type_id in type_ids and kind == FieldStore.VALUE_INT:
+                    values.add(value)
+
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.__class__ is NodeList and node._records is not None:
+                subname, record, items, offset = node._records
+                for index, field in enumerate(record.get_fields()):
+                    if field[0] in types:
+                        values.update(item[index] for item in items)
+                continue
+
+            children = node._children
+            if not children or children.__class__ is int:
+                continue
+            for child in children:
+                if child.__class__ is int:
+                    continue
+                if isinstance(child, NodeField) and child.get_type() in types:
+                    values.add(child.value())
+                stack.append(child)
+
+        return values
+
+    # bank objects index their children on first find (see wfinder.NodeIndex)
+    def set_indexed(self, flag):
+        self._indexed = flag
+
+    def is_indexed(self):
+        return self._indexed
+
+    # finished nodes are passed to the streamer as parsed (see DumpPrinter.stream_node)
+    def set_streamer(self, streamer):
+        self._streamer = streamer
+
+    def stream(self, node):
+        if self._streamer:
+            self._streamer.stream_node(node)
+
+    # process pool and number of jobs to parse parts of the bank (see wparser.parse_hirc_ranges)
+    def set_executor(self, executor, jobs):
+        self._executor = (executor, jobs)
+
+    def get_executor(self):
+        return self._executor
+
+    # parts of the bank to parse (see wparser.PARSE_PROFILES)
+    def set_profile(self, profile):
+        self._profile = profile
+
+    def get_profile(self):
+        return self._profile
+
+    # parse stats (see wprofiler)
+    def set_profiler(self, profiler):
+        self._profiler = profiler
+
+    def get_profiler(self):
+        return self._profiler
+
+    # errors/skips found when parsing parts elsewhere
+    def add_counts(self, error_count, skip_count):
+        self._error_count += error_count
+        self._skip_count += skip_count
+
     def is_be(self):
+        if not self.__r:
+            return self._be
         return self.__r.get_endian_big()
 
+    # *** packing (see wpacker) ***
+
+    # the reader isn't packed (may hold an open file or mmap), as packing loads all parts first
+    def _pack(self, packer):
+        return (self.__filename, self.__path, self.is_be(), self._version, self._id, self._subversion, self._lang,
+                self._feedback, self._custom, self._strings, self._error_count, self._skip_count)
+
+    @classmethod
+    def _unpack(cls, parent, state, packer):
+        filename, path, be, version, id, subversion, lang, feedback, custom, strings, error_count, skip_count = state
+        node = cls(None, version)
+        node.__filename = filename
+        node.__path = path
+        node._be = be
+        node._id = id
+        node._subversion = subversion
+        node._lang = lang
+        node._feedback = feedback
+        node._custom = custom
+        node._strings = list(strings) #tables may be unpacked more than once
+        node._error_count = error_count
+        node._skip_count = skip_count
+        return node
+
 
 # logical node container of other nodes, with data reading helpers (represents a class)
 class NodeObject(NodeElement):
-    __slots__ = ['__r', '__name', 'lastval', '_index']
+    __slots__ = ['__r', '__name', 'lastval', '_index', '_lazy', '_finds']
 
     def __init__(self, parent, r, name):
         super(NodeObject, self).__init__(parent, 'object')
@@ -257,16 +471,15 @@ class NodeObject(NodeElement):
         self.__name = name
         self._index = None
         self.lastval = None
+        self._lazy = None
+        self._finds = None
 
     # *** inheritance ***
 
-    def get_attrs(self):
-        attrs = OrderedDict([
-            ('name', self.__name),
-        ])
+    def get_attr_items(self):
         if self._index is not None:
-            attrs['index'] = self._index
-        return attrs
+            return (('name', self.__name), ('index', self._index))
+        return (('name', self.__name),)
 
     def get_attr(self, attr):
         if attr == 'name':
@@ -278,6 +491,27 @@ class NodeObject(NodeElement):
     def get_name(self):
         return self.__name
 
+    def get_children(self):
+        if self._lazy is not None:
+            self._load()
+        fields = self._root._fields
+        if fields is not None and self._children:
+            return fields.expand(self, self._children)
+        return self._children
+
+    def get_loaded_children(self):
+        fields = self._root._fields
+        if fields is not None and self._children:
+            return fields.expand(self, self._children)
+        return self._children
+
+    def is_loaded(self):
+        return self._lazy is None
+
+    # frees the index made when searching (see wfinder.NodeIndex)
+    def release_index(self):
+        self._finds = None
+
     # changes name, mainly to alter subclasses
     def set_name(self, name):
         self.__name = name
@@ -458,9 +692,64 @@ class NodeObject(NodeElement):
 
         return child
 
+    # Register a list of fixed size records (see NodeRecord), read in one go rather than field
+    # by field. Items are created on first access and values are returned as a list of tuples.
+    def records(self, name, subname, count, record):
+        r = self.__r
+        offset = r.current()
+        size = record.get_size() * count
+
+        # bad sizes are read as a regular list to get the same nodes and errors
+        max_offset = r.get_size()
+        if self._omax and self._omax < max_offset:
+            max_offset = self._omax
+        if count > 0x30000 or offset + size > max_offset:
+            return self._records_fields(name, subname, count, record)
+
+        child = NodeList(self, name)
+        child._count = count
+        self.append(child)
+
+        items = None
+        for format in record.get_formats():
+            values = r.records(format, count)
+            if items is None:
+                items = values
+            else:
+                items = [item + value for item, value in zip(items, values)]
+
+        items = record.fix_values(items)
+        child._records = (subname, record, items, offset)
+        return items
+
+    def _records_fields(self, name, subname, count, record):
+        # items are made as read, so a truncated list ends with the failing item like regular lists
+        if len(record.groups) == 1:
+            items = []
+            for elem in self.list(name, subname, count):
+                values = []
+                for type, fieldname, fmt, hashtype in record.groups[0]:
+                    elem.field(type, fieldname).fmt(fmt).fnv(hashtype)
+                    values.append(elem.lastval)
+                items.append(tuple(values))
+            return items
+
+        # split lists read all ids then all values, so all items must exist first
+        elems = self.list(name, subname, count).preload()
+        items = [() for elem in elems]
+        for group in record.groups:
+            for i, elem in enumerate(elems):
+                values = []
+                for type, fieldname, fmt, hashtype in group:
+                    elem.field(type, fieldname).fmt(fmt).fnv(hashtype)
+                    values.append(elem.lastval)
+                items[i] += tuple(values)
+        return items
+
     # register and add a list node and return iterator with new nodes
     def list(self, name, subname, count):
         child = NodeList(self, name)
+        child._count = count
         self.append(child)
 
         # usually will fail by reading past object but in rare cases can generate too many fields
@@ -525,11 +814,70 @@ class NodeObject(NodeElement):
             return
         if to_skip < 0:
             raise ValueError("wrong consume: offset=%x, omax=%x, to_skip=%x" % (offset, omax, to_skip))
+        if self._lazy is not None:
+            # rest is read on load
+            self.__r.skip(to_skip)
+            return self
         self.__r.gap(to_skip)
         self.append(NodeSkip(self, offset, to_skip))
         self.get_root()._skip_count += 1
         return self
 
+    # skips data up to object's max offset when it isn't needed (not an issue unlike consume)
+    def skip(self):
+        offset = self.__r.current()
+        omax = self._omax
+        if omax is None:
+            raise ValueError("skip without size")
+
+        to_skip = omax - offset
+        if to_skip <= 0:
+            return self
+        self.__r.gap(to_skip)
+        self.append(NodeSkip(self, offset, to_skip))
+        return self
+
+    # Marks current offset to be read later by loader(obj, arg), on first get_children().
+    # Fields read until consume() are kept until then (loader must read them again).
+    # Objects without reader (unpacked) are loaded without offsets.
+    # Passing no loader unmarks the object.
+    def lazy(self, loader=None, arg=None):
+        if loader is None:
+            self._lazy = None
+            return self
+        count = 0
+        if self._children:
+            count = len(self._children)
+        offset = None
+        if self.__r:
+            offset = self.__r.current()
+        self._lazy = (loader, arg, offset, count)
+        return self
+
+    def _load(self):
+        loader, arg, offset, count = self._lazy
+        self._lazy = None
+
+        if self._children:
+            del self._children[count:]
+
+        if offset is None:
+            loader(self, arg)
+        else:
+            r = self.__r
+            current = r.current()
+            r.seek(offset)
+            loader(self, arg)
+            r.seek(current)
+
+        fields = self._root._fields
+        if fields is not None:
+            fields.compact(self)
+
+    # direct reader access, for quick reads without making nodes
+    def get_reader(self):
+        return self.__r
+
     def offset_info(self):
         offset = self.__r.current()
         omax = self._omax
@@ -537,32 +885,81 @@ class NodeObject(NodeElement):
         #TODO improve
         return (omax, offset)
 
+    # *** packing (see wpacker) ***
+
+    def _pack(self, packer):
+        return (self.__name, self._index)
+
+    @classmethod
+    def _unpack(cls, parent, state, packer):
+        name, index = state
+        node = cls(parent, None, name)
+        node._index = index
+        return node
+
 
 # simple subnode container (represents an array)
 class NodeList(NodeElement):
-    __slots__ = ['__name']
+    __slots__ = ['__name', '_count', '_records']
 
     def __init__(self, parent, name):
         super(NodeList, self).__init__(parent, 'list')
         self.__name = name
+        self._count = None
+        self._records = None
 
     # *** inheritance ***
 
-    def get_attrs(self):
+    def get_children(self):
+        if self._records is not None:
+            self._load_records()
+        return self._children
+
+    def get_loaded_children(self):
+        if self._records is not None:
+            self._load_records()
+        return self._children
+
+    def is_loaded(self):
+        return self._records is None
+
+    # makes record nodes (see NodeObject.records)
+    def _load_records(self):
+        subname, record, items, offset = self._records
+        self._records = None
+
+        fields = record.get_fields()
+        for index, values in enumerate(items):
+            obj = NodeObject(self, None, subname)
+            obj._index = index
+            self.append(obj)
+
+            for (type, name, fmt, hashtype, start, stride, pos), value in zip(fields, values):
+                child = NodeField(obj, offset + start * len(items) + stride * index + pos, type, name, value)
+                child.fmt(fmt)
+                child.fnv(hashtype)
+                obj.append(child)
+            obj.lastval = value
+
+        store = self._root._fields
+        if store is not None:
+            store.compact(self)
+
+    def get_attr_items(self):
+        if self._records is not None:
+            self._load_records()
         count = 0
         if self._children:
             count = len(self._children)
 
-        attrs = OrderedDict([
-            ('name', self.__name),
-            ('count', count),
-        ])
-        return attrs
+        return (('name', self.__name), ('count', count))
 
     def get_attr(self, attr):
         if attr == 'name':
             return self.__name
         if attr == 'count':
+            if self._records is not None:
+                self._load_records()
             count = 0
             if self._children:
                 count = len(self._children)
@@ -572,6 +969,35 @@ class NodeList(NodeElement):
     def get_name(self):
         return self.__name
 
+    # declared number of items (may differ from loaded items on errors)
+    def get_count(self):
+        return self._count
+
+    # *** packing (see wpacker) ***
+
+    # unloaded records are packed as-is (children are only packed once loaded)
+    def _pack(self, packer):
+        records = self._records
+        if records is not None:
+            subname, record, items, offset = records
+            fields = [(type, name, packer.get_fmt_key(fmt), hashtype, start, stride, pos)
+                for type, name, fmt, hashtype, start, stride, pos in record.get_fields()]
+            records = (subname, fields, items, offset)
+        return (self.__name, self._count, records)
+
+    @classmethod
+    def _unpack(cls, parent, state, packer):
+        name, count, records = state
+        node = cls(parent, name)
+        node._count = count
+        if records is not None:
+            subname, fields, items, offset = records
+            record = NodeRecord()
+            record._fields = [(type, name, packer.get_fmt(fmt), hashtype, start, stride, pos)
+                for type, name, fmt, hashtype, start, stride, pos in fields]
+            node._records = (subname, record, items, offset)
+        return node
+
 
 # semi-leaf node describing a physical data "field" (represents a primitive member)
 class NodeField(NodeElement):
@@ -589,29 +1015,22 @@ class NodeField(NodeElement):
 
     # *** inheritance ***
 
-    def get_attrs(self):
-        attrs = OrderedDict()
+    def get_attr_items(self):
+        type = self.__type
+        value = self.__value
         if self.__offset:
-            attrs['offset'] = self.__offset
-        attrs['type'] = self.__type
-        attrs['name'] = self.__name
-        attrs['value'] = self.__value
+            items = [('offset', self.__offset), ('type', type), ('name', self.__name), ('value', value)]
+        else:
+            items = [('type', type), ('name', self.__name), ('value', value)]
         if self.__fmt:
-            attrs['valuefmt'] = self.__fmt.format(self.__type, self.__value)
+            items.append(('valuefmt', self.__fmt.format(type, value)))
 
-        if self.__type in [TYPE_SID, TYPE_TID]:
-            row = self._get_namerow()
-            if row:
-                if row.hashname and self.__hashtype != wdefs.fnv_no:
-                    attrs['hashname'] = row.hashname
-                if row.guidname:
-                    attrs['guidname'] = row.guidname
-                if row.path:
-                    attrs['path'] = row.path
-                if row.objpath:
-                    attrs['objpath'] = row.objpath
-
-        return attrs
+        names = self.get_names()
+        if names:
+            for key, name in zip(NAME_ATTRS, names):
+                if name:
+                    items.append((key, name))
+        return items
 
     def get_attr(self, attr):
         if attr == 'offset':
@@ -640,6 +1059,31 @@ class NodeField(NodeElement):
     def get_name(self):
         return self.__name
 
+    # direct access to attrs (for printers, faster than get_attrs)
+
+    def get_offset(self):
+        return self.__offset
+
+    def get_type(self):
+        return self.__type
+
+    def get_valuefmt(self):
+        if self.__fmt:
+            return self.__fmt.format(self.__type, self.__value)
+        return None
+
+    # names of sid/tid values, as NAME_ATTRS values (or None)
+    def get_names(self):
+        if self.__type != TYPE_SID and self.__type != TYPE_TID:
+            return None
+        row = self._get_namerow()
+        if not row:
+            return None
+        hashname = row.hashname
+        if self.__hashtype == wdefs.fnv_no:
+            hashname = None
+        return (hashname, row.guidname, row.path, row.objpath)
+
     def _get_namerow(self):
         # row in cache
         if self.__row is not None:
@@ -706,6 +1150,221 @@ class NodeField(NodeElement):
         self.__hashtype = hashtype
         return self
 
+    # *** packing (see wpacker) ***
+
+    def _get_state(self):
+        return (self.__offset, self.__type, self.__name, self.__value, self.__fmt, self.__hashtype)
+
+    def _pack(self, packer):
+        fmt = self.__fmt
+        if fmt is not None:
+            fmt = packer.get_fmt_key(fmt)
+        return (self.__offset, self.__type, self.__name, self.__value, fmt, self.__hashtype)
+
+    @classmethod
+    def _unpack(cls, parent, state, packer):
+        offset, type, name, value, fmt, hashtype = state
+        node = cls(parent, offset, type, name, value)
+        if fmt is not None:
+            node.__fmt = packer.get_fmt(fmt)
+        node.__hashtype = hashtype
+        return node
+
+
+# field created on access from a FieldStore
+class NodeFieldView(NodeField):
+    __slots__ = ['_store', '_index']
+
+    def __init__(self, parent, store, index):
+        offset, type, name, value, fmt, hashtype = store.get_state(index)
+        super(NodeFieldView, self).__init__(parent, offset, type, name, value)
+        self.fmt(fmt)
+        self.fnv(hashtype)
+        self._store = store
+        self._index = index
+
+    def _get_namerow(self):
+        # views are discarded, so keep rows in store
+        rows = self._store.rows
+        row = rows.get(self._index)
+        if row is None:
+            row = super(NodeFieldView, self)._get_namerow()
+            rows[self._index] = row
+        return row
+
+
+# Compact storage of leaf fields, as parallel arrays indexed by field (for big banks that make
+# millions of NodeFields). Objects' children keep consecutive fields as a single int (first
+# index + count), or just the int if there are no other children, and get_children() returns
+# views (NodeFieldView) instead. Values are saved as 64-bit ints (floats as their bits) and
+# other rare values (strings, big ints) in a dict.
+class FieldStore(object):
+    RUN_BITS = 16
+    RUN_MAX = (1 << RUN_BITS) - 1
+
+    VALUE_INT = 0
+    VALUE_FLOAT = 1
+    VALUE_OTHER = 2
+
+    _INT = struct.Struct('<q')
+    _FLOAT = struct.Struct('<d')
+    _INT_MIN = -0x8000000000000000
+    _INT_MAX = 0x7FFFFFFFFFFFFFFF
+
+    def __init__(self):
+        self.offsets = array('q')
+        self.types = array('B')
+        self.names = array('I')
+        self.values = array('q')
+        self.kinds = array('B')
+        self.fmts = array('H')
+        self.hashtypes = array('B')
+        self.others = {}
+        self.rows = {}
+
+        # interned values, index 0 is the default (types are few and stored as bytes, so they
+        # don't share a table with names)
+        self._types = [None]
+        self._type_ids = {}
+        self._names = [None]
+        self._name_ids = {}
+        self._formats = [None]
+        self._format_ids = {}
+        self._hashtypes = [False]
+        self._hashtype_ids = {}
+
+    def __len__(self):
+        return len(self.types)
+
+    def _intern(self, items, ids, key, value):
+        id = ids.get(key)
+        if id is None:
+            id = len(items)
+            items.append(value)
+            ids[key] = id
+        return id
+
+    def add(self, field):
+        offset, type, name, value, fmt, hashtype = field._get_state()
+        index = len(self.types)
+
+        # ids first, so columns stay in sync if one fails
+        type_id = self._intern(self._types, self._type_ids, type, type)
+        name_id = self._intern(self._names, self._name_ids, name, name)
+
+        fmt_id = 0
+        if fmt is not None:
+            fmt_id = self._intern(self._formats, self._format_ids, id(fmt), fmt)
+
+        hashtype_id = 0
+        if hashtype is not False:
+            hashtype_id = self._intern(self._hashtypes, self._hashtype_ids, hashtype, hashtype)
+
+        if offset is None:
+            offset = -1
+        self.offsets.append(offset)
+        self.types.append(type_id)
+        self.names.append(name_id)
+
+        if value.__class__ is int and self._INT_MIN <= value <= self._INT_MAX:
+            self.values.append(value)
+            self.kinds.append(self.VALUE_INT)
+        elif value.__class__ is float:
+            self.values.append(self._INT.unpack(self._FLOAT.pack(value))[0])
+            self.kinds.append(self.VALUE_FLOAT)
+        else:
+            self.values.append(0)
+            self.kinds.append(self.VALUE_OTHER)
+            self.others[index] = value
+
+        self.fmts.append(fmt_id)
+        self.hashtypes.append(hashtype_id)
+
+        return index
+
+    # interned ids of some types
+    def get_type_ids(self, types):
+        return [self._type_ids[type] for type in types if type in self._type_ids]
+
+    def get_state(self, index):
+        offset = self.offsets[index]
+        if offset < 0:
+            offset = None
+
+        kind = self.kinds[index]
+        if kind == self.VALUE_INT:
+            value = self.values[index]
+        elif kind == self.VALUE_FLOAT:
+            value = self._FLOAT.unpack(self._INT.pack(self.values[index]))[0]
+        else:
+            value = self.others[index]
+
+        return (offset, self._types[self.types[index]], self._names[self.names[index]], value,
+                self._formats[self.fmts[index]], self._hashtypes[self.hashtypes[index]])
+
+    # moves loaded leaf fields under node to the store
+    def compact(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            children = node._children
+            if not children:
+                continue
+
+            if node.__class__ is not NodeObject:
+                stack.extend(children)
+                continue
+            if node._lazy is not None:
+                continue
+
+            if children.__class__ is int:
+                continue
+
+            items = []
+            start = None
+            for child in children:
+                if child.__class__ is NodeField and not child._children:
+                    if start is not None and len(self.types) - start == self.RUN_MAX:
+                        items.append(self._get_run(start))
+                        start = None
+                    index = self.add(child)
+                    if start is None:
+                        start = index
+                    continue
+
+                if start is not None:
+                    items.append(self._get_run(start))
+                    start = None
+                items.append(child)
+                if child.__class__ is not int:
+                    stack.append(child)
+
+            if start is not None:
+                items.append(self._get_run(start))
+
+            if len(items) == 1 and items[0].__class__ is int:
+                node._children = items[0]
+            else:
+                node._children = items
+
+    def _get_run(self, start):
+        return (start << self.RUN_BITS) | (len(self.types) - start)
+
+    def expand(self, node, children):
+        if children.__class__ is int:
+            children = [children]
+
+        items = []
+        for child in children:
+            if child.__class__ is int:
+                start = child >> self.RUN_BITS
+                end = start + (child & self.RUN_MAX)
+                for index in range(start, end):
+                    items.append(NodeFieldView(node, self, index))
+            else:
+                items.append(child)
+        return items
+
 
 # leaf node that signals a portion of data skipped
 class NodeSkip(NodeElement):
@@ -718,12 +1377,18 @@ class NodeSkip(NodeElement):
 
     # *** inheritance ***
 
-    def get_attrs(self):
-        attrs = OrderedDict([
-            ('offset', self.__offset),
-            ('size', self.__size),
-        ])
-        return attrs
+    def get_attr_items(self):
+        return (('offset', self.__offset), ('size', self.__size))
+
+    # *** packing (see wpacker) ***
+
+    def _pack(self, packer):
+        return (self.__offset, self.__size)
+
+    @classmethod
+    def _unpack(cls, parent, state, packer):
+        offset, size = state
+        return cls(parent, offset, size)
 
 # leaf node that signals some error in data
 class NodeError(NodeElement):
@@ -735,11 +1400,135 @@ class NodeError(NodeElement):
 
     # *** inheritance ***
 
-    def get_attrs(self):
-        attrs = OrderedDict([
-            ('message', self.__msg),
-        ])
-        return attrs
+    def get_attr_items(self):
+        return (('message', self.__msg),)
+
+    # *** packing (see wpacker) ***
+
+    def _pack(self, packer):
+        return self.__msg
+
+    @classmethod
+    def _unpack(cls, parent, state, packer):
+        return cls(parent, state)
+
+
+# Layout of a fixed size record, to read lists of them with NodeObject.records. Declared like
+# object fields (ex. NodeRecord().sid('id').U32('uOffset')), and fields after split() are read
+# as a separate array after previous ones (for lists saved as all ids then all values).
+class NodeRecord(object):
+    def __init__(self):
+        self.groups = [[]]
+        self._fields = None
+        self._formats = None
+        self._size = None
+
+    def field(self, type, name, fmt=None, hashtype=False):
+        if type not in RECORD_FORMATS:
+            raise ValueError("unsupported record type " + type)
+        self.groups[-1].append((type, name, fmt, hashtype))
+        self._fields = None
+        self._formats = None
+        self._size = None
+        return self
+
+    def split(self):
+        self.groups.append([])
+        self._fields = None
+        self._formats = None
+        self._size = None
+        return self
+
+    def sid(self, name, hashtype=False):
+        return self.field(TYPE_SID, name, hashtype=hashtype)
+
+    def tid(self, name, hashtype=False):
+        return self.field(TYPE_TID, name, hashtype=hashtype)
+
+    def uni(self, name):
+        return self.field(TYPE_UNI, name)
+
+    def u32(self, name, fmt=None):
+        return self.field(TYPE_U32, name, fmt)
+
+    def U32(self, name, fmt=None):
+        return self.field(TYPE_U32, name, fmt or wdefs.fmt_hex)
+
+    def s32(self, name, fmt=None):
+        return self.field(TYPE_S32, name, fmt)
+
+    def u16(self, name, fmt=None):
+        return self.field(TYPE_U16, name, fmt)
+
+    def U16(self, name, fmt=None):
+        return self.field(TYPE_U16, name, fmt or wdefs.fmt_hex)
+
+    def s16(self, name, fmt=None):
+        return self.field(TYPE_S16, name, fmt)
+
+    def u8i(self, name, fmt=None):
+        return self.field(TYPE_U8, name, fmt)
+
+    def U8x(self, name, fmt=None):
+        return self.field(TYPE_U8, name, fmt or wdefs.fmt_hex)
+
+    def s8i(self, name, fmt=None):
+        return self.field(TYPE_S8, name, fmt)
+
+    def f32(self, name, fmt=None):
+        return self.field(TYPE_F32, name, fmt)
+
+    def d64(self, name, fmt=None):
+        return self.field(TYPE_D64, name, fmt)
+
+    def get_formats(self):
+        if self._formats is None:
+            self._formats = [''.join([RECORD_FORMATS[item[0]] for item in group]) for group in self.groups]
+        return self._formats
+
+    def get_size(self):
+        if self._size is None:
+            self._size = sum([TYPES_SIZE[item[0]] for group in self.groups for item in group])
+        return self._size
+
+    # fields as (type, name, fmt, hashtype, group start, group size, position in group)
+    def get_fields(self):
+        if self._fields is None:
+            fields = []
+            start = 0
+            for group in self.groups:
+                stride = sum([TYPES_SIZE[item[0]] for item in group])
+                pos = 0
+                for type, name, fmt, hashtype in group:
+                    fields.append((type, name, fmt, hashtype, start, stride, pos))
+                    pos += TYPES_SIZE[type]
+                start += stride
+            self._fields = fields
+        return self._fields
+
+    # same special values as NodeObject.field
+    def fix_values(self, items):
+        fixes = []
+        for index, field in enumerate(self.get_fields()):
+            type = field[0]
+            if type == TYPE_U32 or type == TYPE_SID or type == TYPE_TID or type == TYPE_UNI:
+                fixes.append((index, type))
+        if not fixes:
+            return items
+
+        uni_struct = struct.Struct('<f')
+        int_struct = struct.Struct('<I')
+        fixed_items = []
+        for item in items:
+            for index, type in fixes:
+                value = item[index]
+                if type == TYPE_UNI:
+                    if value > 0x10000000:
+                        item = item[:index] + (uni_struct.unpack(int_struct.pack(value))[0],) + item[index+1:]
+                elif value == 0xFFFFFFFF:
+                    item = item[:index] + (-1,) + item[index+1:]
+            fixed_items.append(item)
+        return fixed_items
 
 
 # Iterator used to create new NodeObjects until count, if they don't exist.
@@ -797,6 +1586,50 @@ class NodeListIterator:
         return items
 
 
+# Removes loaded children under nodes (parts of a tree that won't be read again, see
+# Generator.set_low_memory), except used nodes and their parents, so the rest can be freed.
+# Unloaded parts are left as-is. Used fields in compact arrays are kept as their views,
+# though the FieldStore itself remains.
+def release_nodes(nodes, used):
+    keys = set()
+    views = {}
+    for node in used:
+        if node is None:
+            continue
+        if node.__class__ is NodeFieldView:
+            parent = node._parent
+            views.setdefault(id(parent), {})[node._index] = node
+            node = parent
+        while node is not None and id(node) not in keys:
+            keys.add(id(node))
+            node = node._parent
+
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if not node.is_loaded():
+            continue
+        children = node.get_loaded_children()
+        if not children:
+            continue
+
+        parent_views = views.get(id(node))
+        items = []
+        for child in children:
+            if child.__class__ is NodeFieldView:
+                child = parent_views.get(child._index) if parent_views else None
+                if child is None:
+                    continue
+            elif id(child) not in keys:
+                continue
+            items.append(child)
+            stack.append(child)
+
+        node._children = items or None
+        if node.__class__ is NodeObject:
+            node._finds = None
+
+
 class ParseError(Exception):
     def __init__(self, msg, obj):
         super(ParseError, self).__init__(msg)
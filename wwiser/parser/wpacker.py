@@ -0,0 +1,339 @@
+import gc, pickle
+from array import array
+from . import wmodel, wdefs, wfmt
+
+
+# Converts a parsed bank tree to a flat list of plain tuples (and back), which is much faster
+# to pickle than node objects (that also have parent/root refs). Used to move trees between
+# processes and to cache them.
+#
+# Each item is (kind, subtree size, node state), in tree order (node, then its children's
+# subtrees). Node state is defined by each node class (_pack/_unpack). Formatters are module
+# objects in wdefs, so they are saved by name.
+#
+# Making nodes is most of the cost, so objects' children are unpacked on first access
+# (see NodeObject.lazy), as callers often only need a few objects of the whole tree.
+#
+# Tables can be converted to a compact binary form (see dumps/loads) to send to other processes
+# or save to disk: states are split into typed arrays per node kind and field, and repeated
+# values (names, types, formatters) are saved once in a table of constants, so it's smaller and
+# faster to (un)pickle than a list of many small tuples.
+
+PACKED_FORMAT = 1
+
+NODE_CLASSES = [
+    wmodel.NodeRoot,
+    wmodel.NodeObject,
+    wmodel.NodeList,
+    wmodel.NodeField,
+    wmodel.NodeSkip,
+    wmodel.NodeError,
+]
+
+FORMATTER_CLASSES = (
+    wfmt.FormatterHex,
+    wfmt.FormatterLUT,
+    wfmt.FormatterChannelConfig,
+)
+
+
+class NodePacker(object):
+    def __init__(self):
+        self._kinds = {}
+        for kind, cls in enumerate(NODE_CLASSES):
+            self._kinds[cls] = kind
+        self._unpackers = [cls._unpack for cls in NODE_CLASSES]
+        # packed as regular fields
+        self._kinds[wmodel.NodeFieldView] = self._kinds[wmodel.NodeField]
+        self._list_kind = self._kinds[wmodel.NodeList]
+
+        # version dependant aliases (ex. AkPropID) are declared after their real definitions
+        # (ex. AkPropID_128), so the first name found is the one that doesn't change
+        self._fmt_keys = {}
+        self._fmts = {}
+        for name, value in vars(wdefs).items():
+            if not isinstance(value, FORMATTER_CLASSES):
+                continue
+            if id(value) in self._fmt_keys:
+                continue
+            self._fmt_keys[id(value)] = name
+            self._fmts[name] = value
+
+    def get_fmt_key(self, fmt):
+        # unknown formatters are passed as-is
+        return self._fmt_keys.get(id(fmt), fmt)
+
+    def get_fmt(self, key):
+        if isinstance(key, str):
+            return self._fmts[key]
+        return key
+
+    def pack(self, root):
+        kinds = self._kinds
+        list_kind = self._list_kind
+
+        items = []
+        sizes = []
+        # None marks end of the node's subtree
+        stack = [root]
+        starts = []
+        while stack:
+            node = stack.pop()
+            if node is None:
+                index = starts.pop()
+                sizes[index] = len(items) - index
+                continue
+
+            kind = kinds[type(node)]
+            starts.append(len(items))
+            items.append( (kind, node._pack(self)) )
+            sizes.append(1)
+            stack.append(None)
+
+            # records are packed in the list
+            if kind == list_kind and not node.is_loaded():
+                continue
+
+            children = node.get_children()
+            if children:
+                stack.extend(reversed(children))
+
+        return [(kind, size, state) for (kind, state), size in zip(items, sizes)]
+
+    def unpack(self, items):
+        if not items:
+            return None
+
+        kind, size, state = items[0]
+        root = self._unpackers[kind](None, state, self)
+        self._unpack_children(root, (items, 0))
+        return root
+
+    # adds unpacked children of the first item to an existing node
+    def unpack_children(self, node, items):
+        if not items:
+            return
+        self._unpack_children(node, (items, 0))
+
+    def _unpack_children(self, node, arg):
+        items, index = arg
+        unpackers = self._unpackers
+        object_kind = self._kinds[wmodel.NodeObject]
+
+        __, size, __ = items[index]
+        current = index + 1
+        end = index + size
+        while current < end:
+            kind, subsize, state = items[current]
+            child = unpackers[kind](node, state, self)
+            node.append(child)
+
+            if subsize > 1:
+                if kind == object_kind:
+                    child.lazy(self._unpack_children, (items, current))
+                else:
+                    self._unpack_children(child, (items, current))
+            current += subsize
+
+    # *** binary form ***
+
+    # Lots of small tuples are made in one go, and the garbage collector would check the whole
+    # table again and again while doing so (nothing here makes cycles).
+    def _run_nogc(self, function, arg):
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return function(arg)
+        finally:
+            if enabled:
+                gc.enable()
+
+    # table of packed items to bytes
+    def dumps(self, items):
+        return self._run_nogc(self._dumps, items)
+
+    # bytes to table of packed items
+    def loads(self, data):
+        return self._run_nogc(self._loads, data)
+
+    def _dumps(self, items):
+        consts = Consts()
+
+        kinds = array('B', [item[0] for item in items])
+        sizes = _get_array([item[1] for item in items])
+        states = [[] for _ in NODE_CLASSES]
+        appends = [state.append for state in states]
+        for kind, __, state in items:
+            appends[kind](state)
+
+        roots, objects, lists, fields, skips, errors = states
+        others = [] # states or values without a typed array
+
+        # NodeRoot: few, not worth splitting
+        others.append(roots)
+
+        # NodeObject: name, index
+        if objects:
+            names, indexes = zip(*objects)
+        else:
+            names = indexes = ()
+        object_names = consts.add_column(names)
+        object_indexes = _get_array([-1 if index is None else index for index in indexes])
+
+        # NodeList: name, count, records (few but big, pickled as-is)
+        if lists:
+            names, counts, records = zip(*lists)
+        else:
+            names = counts = records = ()
+        list_names = consts.add_column(names)
+        list_counts = _get_array([-1 if count is None else count for count in counts])
+        list_records = []
+        for record in records:
+            if record is None:
+                list_records.append(-1)
+            else:
+                list_records.append(len(others))
+                others.append(record)
+        list_records = _get_array(list_records)
+
+        # NodeField: offset, type, name, value, fmt, hashtype, with values split by type
+        if fields:
+            offsets, types, names, values, fmts, hashtypes = zip(*fields)
+        else:
+            offsets = types = names = values = fmts = hashtypes = ()
+        field_offsets = _get_array([-1 if offset is None else offset for offset in offsets])
+        field_types = consts.add_column(types)
+        field_names = consts.add_column(names)
+        field_fmts = consts.add_column(fmts)
+        field_hashtypes = consts.add_column(hashtypes)
+
+        value_types = array('B', map(VALUE_TYPES.__getitem__, map(type, values)))
+        value_ints = [value for value, value_type in zip(values, value_types) if value_type == VALUE_INT]
+        value_floats = array('d', [value for value, value_type in zip(values, value_types) if value_type == VALUE_FLOAT])
+        value_strs = consts.add_values([value for value, value_type in zip(values, value_types) if value_type == VALUE_STR])
+        value_others = [value for value, value_type in zip(values, value_types) if value_type == VALUE_OTHER]
+        try:
+            value_ints = _get_array(value_ints)
+        except OverflowError:
+            # rare 64-bit values
+            pass
+
+        # NodeSkip: offset, size
+        skip_items = _get_array([value for skip in skips for value in skip])
+
+        # NodeError: message
+        error_msgs = consts.add_values(errors)
+
+        data = (PACKED_FORMAT, kinds, sizes, consts.get_values(), others,
+                object_names, object_indexes, list_names, list_counts, list_records,
+                field_offsets, field_types, field_names, field_fmts, field_hashtypes,
+                value_types, value_ints, value_floats, value_strs, value_others,
+                skip_items, error_msgs)
+        return pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+    def _loads(self, data):
+        data = pickle.loads(data)
+        if data[0] != PACKED_FORMAT:
+            raise ValueError("unknown packed format")
+        (__, kinds, sizes, consts, others,
+            object_names, object_indexes, list_names, list_counts, list_records,
+            field_offsets, field_types, field_names, field_fmts, field_hashtypes,
+            value_types, value_ints, value_floats, value_strs, value_others,
+            skip_items, error_msgs) = data
+        get_const = consts.__getitem__
+
+        roots = others[0]
+
+        objects = list(zip(
+            map(get_const, object_names),
+            [None if index < 0 else index for index in object_indexes]))
+
+        lists = list(zip(
+            map(get_const, list_names),
+            [None if count < 0 else count for count in list_counts],
+            [None if index < 0 else others[index] for index in list_records]))
+
+        value_readers = [
+            iter(value_ints).__next__,
+            iter(value_floats).__next__,
+            iter(list(map(get_const, value_strs))).__next__,
+            iter(value_others).__next__,
+        ]
+        values = [value_readers[value_type]() for value_type in value_types]
+        fields = list(zip(
+            [None if offset < 0 else offset for offset in field_offsets],
+            map(get_const, field_types),
+            map(get_const, field_names),
+            values,
+            map(get_const, field_fmts),
+            map(get_const, field_hashtypes)))
+
+        skips = list(zip(skip_items[0::2], skip_items[1::2]))
+
+        errors = list(map(get_const, error_msgs))
+
+        states = [roots, objects, lists, fields, skips, errors]
+        next_states = [iter(items).__next__ for items in states]
+        return [(kind, size, next_states[kind]()) for kind, size in zip(kinds, sizes)]
+
+
+VALUE_INT = 0
+VALUE_FLOAT = 1
+VALUE_STR = 2
+VALUE_OTHER = 3
+
+class ValueTypes(dict):
+    def __missing__(self, key):
+        return VALUE_OTHER
+
+VALUE_TYPES = ValueTypes({int: VALUE_INT, float: VALUE_FLOAT, str: VALUE_STR})
+
+ARRAY_TYPES = [
+    ('B', 0, 0xFF), ('H', 0, 0xFFFF), ('I', 0, 0xFFFFFFFF),
+    ('b', -0x80, 0x7F), ('h', -0x8000, 0x7FFF), ('i', -0x80000000, 0x7FFFFFFF),
+    ('q', -0x8000000000000000, 0x7FFFFFFFFFFFFFFF),
+]
+
+# ints in the smallest array type that fits them
+def _get_array(values):
+    if not values:
+        return array('B')
+    low = min(values)
+    high = max(values)
+    for typecode, type_low, type_high in ARRAY_TYPES:
+        if type_low <= low and high <= type_high:
+            return array(typecode, values)
+    raise OverflowError("values don't fit in an array")
+
+# table of repeated values, saved once and referenced by index
+class Consts(object):
+    def __init__(self):
+        self._values = []
+        self._indexes = {}
+
+    def add(self, value):
+        # same values of different classes (like 0 and False) are different constants
+        key = (value.__class__, value)
+        index = self._indexes.get(key)
+        if index is None:
+            index = len(self._values)
+            self._indexes[key] = index
+            self._values.append(value)
+        return index
+
+    def add_values(self, values):
+        return _get_array([self.add(value) for value in values])
+
+    # values with few uniques (the usual case) are mapped in one go
+    def add_column(self, values):
+        keys = set(values)
+        # set() merges equal values of different classes, so those go one by one
+        if len(keys) != len(set((value.__class__, value) for value in values)):
+            return self.add_values(values)
+        uniques = {}
+        for value in keys:
+            uniques[value] = self.add(value)
+        return _get_array(list(map(uniques.__getitem__, values)))
+
+    def get_values(self):
+        return self._values
@@ -1,5 +1,7 @@
-import logging
-from . import wmodel, wio, wdefs, wparser_cls as wcls, wparser_plg as wplg
+import logging, os, hashlib
+from concurrent import futures
+from . import wmodel, wio, wdefs, wpacker, wcache, wscanner, wprofiler, wparser_cls as wcls, wparser_plg as wplg
+from .. import wlogs
 
 
 # parser mimics AK's functions, naming and some internals as to simplify debugging.
@@ -30,6 +32,27 @@ def is_custom(obj):
     root = obj.get_root()
     return root.is_custom()
 
+# version dependant definitions are module globals, set per bank
+_setup_version = None
+def setup_version(version):
+    global _setup_version
+    if _setup_version == version:
+        return
+    wdefs.setup(version)
+    wcls.setup()
+    _setup_version = version
+
+# Record layouts (see NodeRecord) depend on current version's definitions, so they are made
+# once per version and key, rather than per list.
+_records = {}
+def get_record(key, make):
+    key = (_setup_version, key)
+    record = _records.get(key)
+    if record is None:
+        record = make()
+        _records[key] = record
+    return record
+
 
 #******************************************************************************
 # HIRC: COMMON
@@ -56,10 +79,11 @@ def parse_plugin(obj, name='ulPluginID'):
 
 #helper
 def parse_rtpc_graph(obj, name='pRTPCMgr', subname='AkRTPCGraphPoint'):
-    for elem in obj.list(name, 'AkRTPCGraphPoint', obj.lastval):
-        elem.f32('From')
-        elem.f32('To')
-        elem.U32('Interp').fmt(wdefs.AkCurveInterpolation)
+    record = get_record('AkRTPCGraphPoint', lambda: wmodel.NodeRecord()
+        .f32('From')
+        .f32('To')
+        .U32('Interp', wdefs.AkCurveInterpolation))
+    obj.records(name, 'AkRTPCGraphPoint', obj.lastval, record)
     return
 
 #128>=
@@ -71,11 +95,11 @@ def AkPropBundle_float_unsigned_short___SetInitialParams(obj, cls):
 
     # despite the generic name this is used by CAkState only
     obj.u16('cProps')
-    elems = obj.list('pProps', 'AkPropBundle', obj.lastval).preload()
-    for elem in elems:
-        elem.U16('pID').fmt(wdefs.AkRTPC_ParameterID) #not a AkPropID (states-params are like mini-RTPCs)
-    for elem in elems:
-        elem.f32('pValue')
+    record = get_record('AkPropBundle<float,unsigned short>', lambda: wmodel.NodeRecord()
+        .U16('pID', wdefs.AkRTPC_ParameterID)
+        .split()
+        .f32('pValue'))
+    obj.records('pProps', 'AkPropBundle', obj.lastval, record) #not a AkPropID (states-params are like mini-RTPCs)
 
 #    count = obj.lastval
 #    for i in range(count):
@@ -91,11 +115,11 @@ def AkPropBundle_float___SetInitialParams(obj, cls):
 
     # despite the generic name this is used by CAkState only
     obj.u8i('cProps')
-    elems = obj.list('pProps', 'AkPropBundle', obj.lastval).preload()
-    for elem in elems:
-        elem.U8x('pID').fmt(wdefs.AkRTPC_ParameterID) #not a AkPropID (states-params are like mini-RTPCs)
-    for elem in elems:
-        elem.f32('pValue')
+    record = get_record('AkPropBundle<float>', lambda: wmodel.NodeRecord()
+        .U8x('pID', wdefs.AkRTPC_ParameterID)
+        .split()
+        .f32('pValue'))
+    obj.records('pProps', 'AkPropBundle', obj.lastval, record) #not a AkPropID (states-params are like mini-RTPCs)
 
 #    count = obj.lastval
 #    for i in range(count):
@@ -156,12 +180,12 @@ def AkPropBundle_RANGED_MODIFIERS_AkPropValue__unsigned_char___SetInitialParams(
         prop_fmt = wdefs.AkPropID
 
     obj.u8i('cProps')
-    elems = obj.list('pProps', 'AkPropBundle', obj.lastval).preload()
-    for elem in elems:
-        elem.U8x('pID').fmt(prop_fmt)
-    for elem in elems:
-        elem.uni('min')
-        elem.uni('max')
+    record = get_record(('AkPropBundle<RANGED_MODIFIERS<AkPropValue>>', modulator), lambda: wmodel.NodeRecord()
+        .U8x('pID', prop_fmt)
+        .split()
+        .uni('min')
+        .uni('max'))
+    obj.records('pProps', 'AkPropBundle', obj.lastval, record)
 
 #    count = obj.lastval
 #    for i in range(count):
@@ -3113,7 +3137,18 @@ def parse_hirc_default(obj):
     return
 
 #046>=
+# dispatch tables per version, made once (per process)
+_hirc_dispatches = {}
+
 def get_hirc_dispatch(obj):
+    version = get_version(obj)
+    hirc_dispatch = _hirc_dispatches.get(version)
+    if hirc_dispatch is None:
+        hirc_dispatch = _get_hirc_dispatch(version)
+        _hirc_dispatches[version] = hirc_dispatch
+    return hirc_dispatch
+
+def _get_hirc_dispatch(version):
     hirc_dispatch = {
         0x01: CAkBankMgr__ReadState,
         0x02: CAkBankMgr__ReadSourceParent_CAkSound_,
@@ -3132,7 +3167,6 @@ def get_hirc_dispatch(obj):
         0x0f: CAkBankMgr__StdBankRead_CAkDialogueEvent_CAkDialogueEvent_,
     }
 
-    version = get_version(obj)
     if   version <= 72:
         hirc_dispatch.update({
             0x10: CAkBankMgr__StdBankRead_CAkFeedbackBus_CAkParameterNodeBase_, #026~~
@@ -3166,6 +3200,77 @@ def get_hirc_dispatch(obj):
 
     return hirc_dispatch
 
+# Lazy loading: items only read fields to identify them (class and ID) while parsing the bank,
+# enough to register and filter them, then the rest is parsed on first access.
+# Keyed by dispatch: (create, ID field, hashtype), where no create means action (class from type).
+_hirc_heads = None
+
+def get_hirc_heads():
+    global _hirc_heads
+    if _hirc_heads is None:
+        _hirc_heads = _get_hirc_heads()
+    return _hirc_heads
+
+def _get_hirc_heads():
+    hirc_heads = {
+        CAkBankMgr__ReadState: (wcls.CAkState__Create, 'ulStateID', wdefs.fnv_no),
+        CAkBankMgr__ReadSourceParent_CAkSound_: (wcls.CAkSound__Create, 'ulID', wdefs.fnv_no),
+        CAkBankMgr__ReadAction: (None, 'ulID', wdefs.fnv_no),
+        CAkBankMgr__ReadEvent: (wcls.CAkEvent__Create, 'ulID', wdefs.fnv_evt),
+        CAkBankMgr__StdBankRead_CAkRanSeqCntr_CAkParameterNodeBase_: (wcls.CAkRanSeqCntr__Create, 'ulID', wdefs.fnv_no),
+        CAkBankMgr__StdBankRead_CAkSwitchCntr_CAkParameterNodeBase_: (wcls.CAkSwitchCntr__Create, 'ulID', wdefs.fnv_no),
+        CAkBankMgr__StdBankRead_CAkActorMixer_CAkParameterNodeBase_: (wcls.CAkActorMixer__Create, 'ulID', wdefs.fnv_no),
+        CAkBankMgr__ReadBus: (wcls.CAkBus__Create, 'ulID', wdefs.fnv_bus),
+        CAkBankMgr__StdBankRead_CAkLayerCntr_CAkParameterNodeBase_: (wcls.CAkLayerCntr__Create, 'ulID', wdefs.fnv_no),
+        CAkBankMgr__StdBankRead_CAkMusicSegment_CAkParameterNodeBase_: (wcls.CAkMusicSegment__Create, 'ulID', wdefs.fnv_no),
+        CAkBankMgr__ReadSourceParent_CAkMusicTrack_: (wcls.CAkMusicTrack__Create, 'ulID', wdefs.fnv_no),
+        CAkBankMgr__StdBankRead_CAkMusicSwitchCntr_CAkParameterNodeBase_: (wcls.CAkMusicSwitchCntr__Create, 'ulID', wdefs.fnv_no),
+        CAkBankMgr__StdBankRead_CAkMusicRanSeqCntr_CAkParameterNodeBase_: (wcls.CAkMusicRanSeqCntr__Create, 'ulID', wdefs.fnv_no),
+        CAkBankMgr__StdBankRead_CAkAttenuation_CAkAttenuation_: (wcls.CAkAttenuation__Create, 'ulID', wdefs.fnv_no),
+        CAkBankMgr__StdBankRead_CAkDialogueEvent_CAkDialogueEvent_: (wcls.CAkDialogueEvent__Create, 'ulID', wdefs.fnv_evt),
+        CAkBankMgr__StdBankRead_CAkFeedbackBus_CAkParameterNodeBase_: (wcls.CAkFeedbackBus__Create, 'ulID', wdefs.fnv_bus),
+        CAkBankMgr__ReadSourceParent_CAkFeedbackNode_: (wcls.CAkFeedbackNode__Create, 'ulID', wdefs.fnv_no),
+        CAkBankMgr__StdBankRead_CAkFxShareSet_CAkFxShareSet_: (wcls.CAkFxShareSet__Create, 'ulID', wdefs.fnv_sfx),
+        CAkBankMgr__StdBankRead_CAkFxCustom_CAkFxCustom_: (wcls.CAkFxCustom__Create, 'ulID', None),
+        CAkBankMgr__StdBankRead_CAkAuxBus_CAkParameterNodeBase_: (wcls.CAkAuxBus__Create, 'ulID', wdefs.fnv_bus),
+        CAkBankMgr__StdBankRead_CAkLFOModulator_CAkModulator_: (wcls.CAkLFOModulator__Create, 'ulID', wdefs.fnv_no),
+        CAkBankMgr__StdBankRead_CAkEnvelopeModulator_CAkModulator_: (wcls.CAkEnvelopeModulator__Create, 'ulID', wdefs.fnv_no),
+        CAkBankMgr__StdBankRead_CAkAudioDevice_CAkAudioDevice_: (wcls.CAkAudioDevice__Create, 'ulID', wdefs.fnv_sfx),
+        CAkBankMgr__StdBankRead_CAkTimeModulator_CAkModulator_: (wcls.CAkTimeModulator__Create, 'ulID', wdefs.fnv_no),
+    }
+    return hirc_heads
+
+# reads item's identifying fields, same as the dispatch's first fields
+def parse_hirc_head(obj, head):
+    create, name, hashtype = head
+
+    if create:
+        cls = create(obj)
+        obj.set_name(cls.name)
+        obj.sid(name).fnv(hashtype)
+    else:
+        obj.sid(name).fnv(hashtype)
+        if get_version(obj) <= 56:
+            obj.U32('ulActionType').fmt(wdefs.AkActionType)
+        else:
+            obj.U16('ulActionType').fmt(wdefs.AkActionType)
+        cls = wcls.CAkAction__Create(obj, obj.lastval)
+        obj.set_name(cls.name)
+    return
+
+# lazy loader, called after the whole bank is parsed
+def parse_hirc_lazy(obj, dispatch):
+    # definitions may be set for another bank at this point
+    setup_version(get_version(obj))
+
+    try:
+        dispatch(obj)
+    except (wmodel.ParseError, wio.ReaderError) as e:
+        obj.add_error(str(e))
+
+    obj.consume()
+    return
+
 #026>=
 def CAkBankMgr__ProcessHircChunk(obj):
     #CAkBankMgr::ProcessHircChunk
@@ -3174,28 +3279,26 @@ def CAkBankMgr__ProcessHircChunk(obj):
     version  = get_version(obj)
 
     hirc_dispatch = get_hirc_dispatch(obj)
+    hirc_heads = None
+    if obj.get_root().is_lazy():
+        hirc_heads = get_hirc_heads()
+    hirc_skips = get_hirc_skips(obj.get_root().get_profile())
+    profiler = obj.get_root().get_profiler()
 
     count = 0
     try:
         obj.u32('NumReleasableHircItem')
-        for elem in obj.list('listLoadedItem', 'AkListLoadedItem', obj.lastval):
-
-            #AkBank::AKBKSubHircSection
-            if version <= 48:
-                elem.U32('eHircType').fmt(wdefs.AkBank__AKBKHircType)
-            else:
-                elem.U8x('eHircType').fmt(wdefs.AkBank__AKBKHircType)
-            hirc_type = elem.lastval
-            elem.U32('dwSectionSize').omax()
-
-            #Section.eHircType switch
-            try:
-                dispatch = hirc_dispatch.get(hirc_type, parse_hirc_default)
-                dispatch(elem)
-            except wmodel.ParseError as e:
-                elem.add_error(str(e))
+        items = obj.list('listLoadedItem', 'AkListLoadedItem', obj.lastval)
+        if parse_hirc_ranges(obj, items):
+            return
 
-            elem.consume()
+        for elem in items:
+            if profiler:
+                mark = profiler.start(obj.get_reader())
+            parse_hirc_item(elem, version, hirc_dispatch, hirc_heads, hirc_skips)
+            if profiler:
+                profiler.done(wprofiler.ParseProfiler.KIND_HIRC, elem, obj.get_reader(), mark)
+            obj.get_root().stream(elem)
             count += 1
 
     except wio.ReaderError as e:
@@ -3203,6 +3306,143 @@ def CAkBankMgr__ProcessHircChunk(obj):
 
     return
 
+def parse_hirc_item(elem, version, hirc_dispatch, hirc_heads, hirc_skips=None):
+    #AkBank::AKBKSubHircSection
+    if version <= 48:
+        elem.U32('eHircType').fmt(wdefs.AkBank__AKBKHircType)
+    else:
+        elem.U8x('eHircType').fmt(wdefs.AkBank__AKBKHircType)
+    hirc_type = elem.lastval
+    elem.U32('dwSectionSize').omax()
+
+    #Section.eHircType switch
+    try:
+        dispatch = hirc_dispatch.get(hirc_type, parse_hirc_default)
+        head = None
+        if hirc_skips:
+            head = hirc_skips.get(dispatch)
+        if head:
+            # not needed by current profile
+            parse_hirc_head(elem, head)
+            elem.skip()
+            return
+
+        if hirc_heads:
+            head = hirc_heads.get(dispatch)
+
+        if head:
+            elem.lazy(parse_hirc_lazy, dispatch)
+            parse_hirc_head(elem, head)
+        else:
+            dispatch(elem)
+    except wmodel.ParseError as e:
+        # same error as a regular parse
+        elem.lazy(None)
+        elem.add_error(str(e))
+
+    elem.consume()
+
+# Big HIRC lists may be parsed in parts by other processes (see Parser.set_hirc_jobs): items
+# are found by reading their sizes, then each range is parsed like usual in a job and added
+# back as packed nodes in the same order. Returns False if the list should be parsed here.
+HIRC_RANGE_MIN = 1000
+
+def parse_hirc_ranges(obj, items):
+    root = obj.get_root()
+    executor = root.get_executor()
+    if not executor or root.is_lazy() or root.get_profiler():
+        return False
+    executor, jobs = executor
+
+    version = get_version(obj)
+    count = obj.lastval
+    parts = min(jobs * 4, count // HIRC_RANGE_MIN)
+    if parts <= 1:
+        return False
+
+    # find item offsets (bad sizes are left to the regular parser and its errors)
+    r = obj.get_reader()
+    start = r.current()
+    omax = obj.offset_info()[0] or r.get_size()
+    offsets = []
+    try:
+        for __ in range(count):
+            offsets.append(r.current())
+            if version <= 48:
+                r.u32()
+            else:
+                r.u8()
+            size = r.u32()
+            r.skip(size)
+            if r.current() > omax:
+                raise wio.ReaderError("item past HIRC size")
+    except wio.ReaderError:
+        r.seek(start)
+        return False
+    end = r.current()
+
+    state = (r.get_endian_big(), r.get_xorpad(), version, root.get_subversion(), root.has_feedback(), root.is_custom(), root.get_id(), root.get_lang(), root.get_profile())
+    filename = os.path.join(root.get_path(), root.get_filename())
+    size = (count + parts - 1) // parts
+    ranges = [(offsets[index], index, min(size, count - index)) for index in range(0, count, size)]
+
+    try:
+        results = list(executor.map(_parse_hirc_job, [filename] * len(ranges), [state] * len(ranges), *zip(*ranges)))
+    except Exception as e:
+        logging.warning("parser: can't parse HIRC in parts, parsing normally (%s)", e)
+        r.seek(start)
+        return False
+
+    # list is empty at this point
+    nodelist = obj.get_children()[-1]
+    packer = wpacker.NodePacker()
+    for packed, error_count, skip_count in results:
+        done = len(nodelist.get_children() or [])
+        packer.unpack_children(nodelist, packer.loads(packed))
+        root.add_counts(error_count, skip_count)
+        for elem in nodelist.get_children()[done:]:
+            root.stream(elem)
+
+    r.seek(end)
+    return True
+
+def _parse_hirc_job(filename, state, offset, start, count):
+    be, xorpad, version, subversion, feedback, custom, id, lang, profile = state
+
+    parser = Parser()
+    parser.set_mmap(True)
+    with open(filename, 'rb') as infile:
+        r = parser._get_reader(infile)
+        try:
+            r.set_endian(be)
+            if xorpad:
+                r.set_xorpad(xorpad)
+            setup_version(version)
+
+            root = wmodel.NodeRoot(r, version)
+            root.set_subversion(subversion)
+            root.set_feedback(feedback)
+            root.set_custom(custom)
+            root.set_id(id)
+            root.set_lang(lang)
+            root.set_profile(profile)
+
+            obj = root.node('chunk')
+            hirc_dispatch = get_hirc_dispatch(obj)
+            hirc_skips = get_hirc_skips(profile)
+            r.seek(offset)
+            for elem in obj.list('listLoadedItem', 'AkListLoadedItem', count):
+                parse_hirc_item(elem, version, hirc_dispatch, None, hirc_skips)
+                elem._index += start
+
+            nodelist = obj.get_children()[0]
+            packer = wpacker.NodePacker()
+            packed = packer.dumps(packer.pack(nodelist))
+        finally:
+            r.close()
+
+    return (packed, root.get_error_count(), root.get_skip_count())
+
 
 #******************************************************************************
 # BKHD
@@ -3720,10 +3960,11 @@ def CAkBankMgr__LoadMediaIndex(obj):
     chunk_size = obj.lastval
 
     uNumMedias = chunk_size // 0x0c
-    for elem in obj.list('pLoadedMedia', 'MediaHeader', uNumMedias):
-        elem.sid('id').fnv(wdefs.fnv_no)
-        elem.U32('uOffset')
-        elem.U32('uSize')
+    record = get_record('MediaHeader', lambda: wmodel.NodeRecord()
+        .sid('id', wdefs.fnv_no)
+        .U32('uOffset')
+        .U32('uSize'))
+    obj.records('pLoadedMedia', 'MediaHeader', uNumMedias, record)
     return
 
 
@@ -3804,6 +4045,12 @@ def parse_chunk(obj):
         tag = obj.lastval
         obj.U32('dwChunkSize').omax()
 
+        chunks = get_profile_chunks(obj.get_root().get_profile())
+        if chunks is not None and tag not in chunks:
+            # not needed by current profile
+            obj.skip()
+            return
+
         dispatch = chunk_dispatch.get(tag, parse_chunk_default)
         dispatch(obj)
     except wmodel.ParseError as e:
@@ -3816,6 +4063,84 @@ def parse_chunk(obj):
 
 # #############################################################################
 
+# Parse profiles: some uses only need parts of the bank, so unneeded chunks and HIRC types
+# are skipped as a whole (like unknown data, but not counted as skips to report). Skipped HIRC
+# items still read their head (class and ID) so they can be found and listed.
+PROFILE_FULL = 'full'
+PROFILE_TXTP = 'txtp'
+PROFILE_NAMES = 'names'
+PROFILE_MEDIA = 'media'
+
+# profile: (chunks to parse or None for all, HIRC types to skip)
+PARSE_PROFILES = {
+    PROFILE_FULL: (None, []),
+    # generator: bank info, media index, global settings and audio tree
+    PROFILE_TXTP: ({b'AKBK', b'BKHD', b'HIRC', b'DIDX', b'STMG', b'STID'}, [
+        CAkBankMgr__StdBankRead_CAkAttenuation_CAkAttenuation_,
+        CAkBankMgr__StdBankRead_CAkLFOModulator_CAkModulator_,
+        CAkBankMgr__StdBankRead_CAkEnvelopeModulator_CAkModulator_,
+        CAkBankMgr__StdBankRead_CAkTimeModulator_CAkModulator_,
+    ]),
+    # name lists: everything that may have hashed IDs
+    PROFILE_NAMES: ({b'AKBK', b'BKHD', b'HIRC', b'STMG', b'STID', b'FXPR'}, []),
+    # media listing: bank info and media index/data
+    PROFILE_MEDIA: ({b'AKBK', b'BKHD', b'DIDX', b'DATA'}, []),
+}
+
+def get_profile_chunks(profile):
+    if not profile:
+        return None
+    return PARSE_PROFILES[profile][0]
+
+def get_hirc_skips(profile):
+    if not profile:
+        return None
+    skips = PARSE_PROFILES[profile][1]
+    if not skips:
+        return None
+    hirc_heads = get_hirc_heads()
+    return {dispatch: hirc_heads[dispatch] for dispatch in skips}
+
+# #############################################################################
+
+# Banks are parsed in separate processes when using multiple jobs. Each process has its own
+# copy of the version-dependant wdefs/wcls module state (set per bank on _check_header), so
+# banks with different versions never share definitions. Parsed trees are sent back as flat
+# tables (see wpacker), as pickling node objects directly is slower than parsing again.
+
+def _init_job():
+    # spawned processes (Windows) don't inherit the main process' logging
+    if not logging.root.handlers:
+        wlogs.setup_cli_logging()
+
+def _parse_bank_job(filename, mmap, lazy, profile):
+    parser = Parser()
+    parser.set_mmap(mmap)
+    parser.set_lazy(lazy)
+    parser.set_profile(profile)
+    parser.parse_bank(filename)
+    item = parser._banks.get(filename)
+    if not item:
+        return None
+    bank, sid, lang, size = item
+    packer = wpacker.NodePacker()
+    return (packer.dumps(packer.pack(bank)), sid, lang, size)
+
+def _scan_bank_job(filename):
+    return Parser().scan_bank(filename)
+
+# hash of file's data, to find identical banks
+def _get_digest(filename):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filename, 'rb') as infile:
+        while True:
+            data = infile.read(0x100000)
+            if not data:
+                break
+            digest.update(data)
+    return digest.digest()
+
+
 class Parser(object):
     # when loading multiple banks
     MULTIBANK_AUTO          = 'auto'
@@ -3841,6 +4166,20 @@ class Parser(object):
         #self._ignore_version = ignore_version
         self._banks = {}
         self._names = None
+        self._mmap = False
+        self._jobs = 1
+        self._lazy = False
+        self._cache = None
+        self._compact = False
+        self._indexed = False
+        self._streamer = None
+        self._infos = []
+        self._hirc_jobs = 1
+        self._executor = None
+        self._profile = None
+        self._unique = False
+        self._profiler = None
+        self._profiler_outname = None
 
 
     def _check_header(self, r, bank):
@@ -3906,20 +4245,186 @@ class Parser(object):
 
         r.seek(current)
 
-        wdefs.setup(version)
-        wcls.setup()
+        setup_version(version)
         return version
 
     def parse_banks(self, filenames):
+        aliases = {}
+        if self._unique and not self._streamer:
+            all_filenames = filenames
+            filenames, aliases = self._find_aliases(filenames)
+
+        if self._profiler and (self._jobs > 1 or self._hirc_jobs > 1):
+            logging.info("parser: jobs ignored when profiling")
+
+        if self._jobs > 1 and len(filenames) > 1 and not self._streamer and not self._profiler:
+            loaded_filenames = self._parse_banks_jobs(filenames)
+        elif self._hirc_jobs > 1 and not self._profiler:
+            with futures.ProcessPoolExecutor(max_workers=self._hirc_jobs, initializer=_init_job) as executor:
+                self._executor = executor
+                try:
+                    loaded_filenames = self._parse_banks_serial(filenames)
+                finally:
+                    self._executor = None
+        else:
+            loaded_filenames = self._parse_banks_serial(filenames)
+
+        if aliases:
+            loaded_filenames = self._add_aliases(all_filenames, loaded_filenames, aliases)
+
+        if self._profiler:
+            self._profiler.report(self._profiler_outname)
+
+        logging.info("parser: done")
+        return loaded_filenames
+
+    # Finds banks with the same data as a previous one (size first, then hash), so only one is
+    # parsed. Returns filenames to parse and a dict of alias > original filename.
+    def _find_aliases(self, filenames):
+        sizes = {}
+        for filename in filenames:
+            if filename in self._banks:
+                continue
+            try:
+                size = os.path.getsize(filename)
+            except OSError:
+                continue # handled when parsing
+            items = sizes.setdefault(size, [])
+            if filename not in items:
+                items.append(filename)
+
+        aliases = {}
+        for items in sizes.values():
+            if len(items) <= 1:
+                continue
+            digests = {}
+            for filename in items:
+                digest = _get_digest(filename)
+                if digest in digests:
+                    aliases[filename] = digests[digest]
+                else:
+                    digests[digest] = filename
+
+        if aliases:
+            logging.info("parser: found %i banks with the same data as others", len(aliases))
+        return [filename for filename in filenames if filename not in aliases], aliases
+
+    # registers banks with the same data as a parsed one, as a copy of its tree (only the bank's
+    # filename changes), keeping the original order. Aliases share one packed table of the tree
+    # and only unpack objects on access (packing loads the whole original bank though).
+    def _add_aliases(self, filenames, loaded_filenames, aliases):
+        packer = wpacker.NodePacker()
+        packed = {}
+        loaded = set(loaded_filenames)
+        for alias, filename in aliases.items():
+            if filename not in loaded or alias in self._banks:
+                continue
+            logging.info("parser: reusing %s for %s (same data)", filename, alias)
+
+            if filename not in packed:
+                bank, sid, lang, size = self._banks[filename]
+                packed[filename] = (packer.pack(bank), sid, lang, size)
+            self._add_table(alias, packed[filename], packer)
+            loaded.add(alias)
+
+        loaded_filenames = []
+        for filename in filenames:
+            if filename in loaded and filename not in loaded_filenames:
+                self._banks[filename] = self._banks.pop(filename)
+                loaded_filenames.append(filename)
+        return loaded_filenames
+
+    def _parse_banks_serial(self, filenames):
         loaded_filenames = []
         for filename in filenames:
             loaded_filename = self.parse_bank(filename)
             if loaded_filename:
                 loaded_filenames.append(loaded_filename)
+        return loaded_filenames
+
+    # parses banks in a process pool, registering results in the original order
+    def _parse_banks_jobs(self, filenames):
+        pending = []
+        for filename in filenames:
+            if filename in self._banks or filename in pending:
+                logging.info("parser: ignoring %s (already parsed)", filename)
+                continue
+            pending.append(filename)
+
+        results = {}
+        if self._cache:
+            for filename in pending:
+                item = self._cache.load(filename, self._profile)
+                if item:
+                    logging.info("parser: loaded %s from cache", filename)
+                    results[filename] = item
+        cached = set(results)
+        parse_filenames = [filename for filename in pending if filename not in results]
+
+        if parse_filenames:
+            jobs = min(self._jobs, len(parse_filenames))
+            logging.info("parser: parsing %i banks with %i jobs", len(parse_filenames), jobs)
+
+            with futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_job) as executor:
+                mmaps = [self._mmap] * len(parse_filenames)
+                lazys = [self._lazy] * len(parse_filenames)
+                profiles = [self._profile] * len(parse_filenames)
+                for filename, item in zip(parse_filenames, executor.map(_parse_bank_job, parse_filenames, mmaps, lazys, profiles)):
+                    if not item:
+                        continue
+                    if self._cache:
+                        self._cache.save(filename, item, self._profile)
+                    results[filename] = item
+
+        packer = wpacker.NodePacker()
+        loaded_filenames = []
+        for filename in pending:
+            item = results.get(filename)
+            if not item:
+                continue
+            self._add_packed(filename, item, packer, cached=filename in cached)
+            loaded_filenames.append(filename)
 
-        logging.info("parser: done")
         return loaded_filenames
 
+    # parsed banks log errors when parsing (jobs too), cached ones when loaded
+    def _add_packed(self, filename, item, packer, cached=False):
+        data, sid, lang, size = item
+        self._add_table(filename, (packer.loads(data), sid, lang, size), packer, cached)
+
+    # adds a bank from a table of packed nodes (objects are unpacked from it on access)
+    def _add_table(self, filename, item, packer, cached=False):
+        items, sid, lang, size = item
+        bank = packer.unpack(items)
+        if cached:
+            self._log_counts(bank)
+        bank.set_filename(filename)
+        if self._names:
+            bank.set_names(self._names)
+        if self._compact:
+            bank.compact()
+        bank.set_indexed(self._indexed)
+        self._banks[filename] = (bank, sid, lang, size)
+
+    def _load_cache(self, filename):
+        if not self._cache or self._streamer or self._profiler:
+            return False
+        item = self._cache.load(filename, self._profile)
+        if not item:
+            return False
+
+        logging.info("parser: loaded %s from cache", filename)
+        self._add_packed(filename, item, wpacker.NodePacker(), cached=True)
+        return True
+
+    def _save_cache(self, filename):
+        if not self._cache or self._streamer:
+            return
+        bank, sid, lang, size = self._banks[filename]
+        packer = wpacker.NodePacker()
+        item = (packer.dumps(packer.pack(bank)), sid, lang, size)
+        self._cache.save(filename, item, self._profile)
+
     # Parses a whole bank into memory and adds to the list. Can be kinda big (ex. ~50MB in RAM)
     # but since games also load banks in memory should be within reasonable limits.
     def parse_bank(self, filename):
@@ -3927,19 +4432,27 @@ class Parser(object):
             logging.info("parser: ignoring %s (already parsed)", filename)
             return
 
+        if self._load_cache(filename):
+            return filename
+
         logging.info("parser: parsing %s", filename)
 
         try:
             with open(filename, 'rb') as infile:
                 #real_filename = infile.name
-                r = wio.FileReader(infile)
-                r.guess_endian32(0x04)
-                res = self._process(r, filename)
+                r = self._get_reader(infile)
+                try:
+                    r.guess_endian32(0x04)
+                    res = self._process(r, filename)
+                finally:
+                    r.close()
 
             if res:
                 logging.info("parser: %s", res)
                 return None
 
+            self._save_cache(filename)
+
             logging.debug("parser: done %s", filename)
             return filename
 
@@ -3952,6 +4465,96 @@ class Parser(object):
 
         return None
 
+    # Reads bank header and chunk sizes only (see wscanner). Parses BKHD like a regular bank
+    # so its values are the same.
+    def scan_bank(self, filename):
+        try:
+            with open(filename, 'rb') as infile:
+                r = wio.FileReader(infile)
+                r.guess_endian32(0x04)
+
+                bank = wmodel.NodeRoot(r)
+                version = self._check_header(r, bank)
+                info = wscanner.BankInfo(filename, r.get_size())
+                info.version = version
+
+                if version <= 14:
+                    obj = bank.node('chunk')
+                    parse_chunk_akbk(obj)
+
+                while not r.is_eof():
+                    offset = r.current()
+                    tag = r.fourcc()
+                    size = r.u32()
+                    info.chunks.append((tag, size))
+
+                    if tag == b'BKHD':
+                        r.seek(offset)
+                        obj = bank.node('chunk')
+                        parse_chunk(obj)
+                    elif tag == b'HIRC':
+                        info.hirc_count = r.u32()
+                    elif tag == b'DIDX':
+                        info.media_count = size // 0x0c #AkMediaHeader
+
+                    r.seek(offset + 0x08 + size)
+
+            root = bank.get_root()
+            info.sid = root.get_id()
+            info.lang = root.get_lang()
+            info.feedback = root.has_feedback()
+            return info
+
+        except wmodel.VersionError as e:
+            logging.info("parser: %s", e.msg)
+        except wio.ReaderError as e:
+            logging.error("parser: error scanning %s (corrupted file?)" % (filename))
+        return None
+
+    # Scans banks (in parallel with jobs) and returns filenames left after handling repeated
+    # banks, so ignored banks don't need to be parsed. Info is kept for get_infos.
+    def scan_banks(self, filenames, mode=None):
+        logging.info("parser: scanning %i banks", len(filenames))
+        if self._jobs > 1 and len(filenames) > 1:
+            jobs = min(self._jobs, len(filenames))
+            with futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_job) as executor:
+                infos = list(executor.map(_scan_bank_job, filenames))
+        else:
+            infos = [self.scan_bank(filename) for filename in filenames]
+
+        done = set()
+        self._infos = []
+        for info in infos:
+            if not info or info.filename in done:
+                continue
+            done.add(info.filename)
+            self._infos.append(info)
+
+        items = [(info, info.sid, info.lang, info.size) for info in self._infos]
+        selected = set(info.filename for info in self._resolve_repeats(items, mode))
+
+        # keep original order, repeats are sorted again after parsing
+        scanned_filenames = [info.filename for info in self._infos if info.filename in selected]
+        ignored = len(self._infos) - len(scanned_filenames)
+        if ignored:
+            logging.info("parser: ignoring %i repeated banks", ignored)
+        return scanned_filenames
+
+    def get_infos(self):
+        return self._infos
+
+    def _get_reader(self, infile):
+        if self._lazy:
+            # lazy objects read data after parsing
+            return wio.MemoryReader(infile)
+        if self._mmap:
+            try:
+                return wio.MmapReader(infile)
+            except (ValueError, OSError):
+                # empty files or unmappable streams
+                logging.debug("parser: can't map %s, using regular reader", infile.name)
+        return wio.FileReader(infile)
+
     def _print_errors(self, e):
         import traceback
 
@@ -3973,6 +4576,17 @@ class Parser(object):
 
     def _process(self, r, filename):
         bank = wmodel.NodeRoot(r)
+        bank.set_lazy(self._lazy)
+        bank.set_indexed(self._indexed)
+        bank.set_streamer(self._streamer)
+        bank.set_profile(self._profile)
+        bank.set_profiler(self._profiler)
+        if self._profiler:
+            self._profiler.add_bank()
+        if self._executor:
+            bank.set_executor(self._executor, self._hirc_jobs)
+        if self._names:
+            bank.set_names(self._names)
 
         try:
             version = self._check_header(r, bank)
@@ -3981,24 +4595,32 @@ class Parser(object):
             if version <= 14:
                 obj = bank.node('chunk')
                 parse_chunk_akbk(obj)
+                bank.stream(obj)
 
+            profiler = self._profiler
             while not r.is_eof():
                 obj = bank.node('chunk')
+                if profiler:
+                    mark = profiler.start(r)
                 parse_chunk(obj)
+                if profiler:
+                    profiler.done(wprofiler.ParseProfiler.KIND_CHUNK, obj, r, mark)
+                bank.stream(obj)
 
         except wmodel.VersionError as e:
             return e.msg
+        finally:
+            # close partially printed banks too
+            if self._streamer:
+                self._streamer.stream_bank(bank)
         #other exceptions should be handled externally
         #except wmodel.ParseError as e:
             #bank.add_error(str(e))
 
-        if bank.get_error_count() > 0:
-            logging.info("parser: ERRORS! %i found (report issue)" % bank.get_error_count())
-        if bank.get_skip_count() > 0:
-            logging.info("parser: SKIPS! %i found (report issue)" % bank.get_skip_count())
+        self._log_counts(bank)
 
-        if self._names:
-            bank.set_names(self._names)
+        if self._compact:
+            bank.compact()
 
         root = bank.get_root()
         sid = root.get_id()
@@ -4008,15 +4630,24 @@ class Parser(object):
         self._banks[filename] = (bank, sid, lang, size)
         return None
 
+    def _log_counts(self, bank):
+        if bank.get_error_count() > 0:
+            logging.info("parser: ERRORS! %i found (report issue)" % bank.get_error_count())
+        if bank.get_skip_count() > 0:
+            logging.info("parser: SKIPS! %i found (report issue)" % bank.get_skip_count())
+
     def get_banks(self, mode=None):
+        # as loaded (MULTIBANK_ALLOW_MANUAL)
+        items = self._banks.values()
+        return self._resolve_repeats(items, mode)
+
+    # handles banks with the same (sid, lang) from a list of (bank, sid, lang, size)
+    def _resolve_repeats(self, items, mode):
         if not mode:
             mode = self.MULTIBANK_AUTO
 
         if mode not in self.MULTIBANK_MODES:
             logging.warning("parser: WARNING, unknown repeat mode '%s'" % (mode))
-            
-        # as loaded (MULTIBANK_ALLOW_MANUAL)
-        items = self._banks.values()
 
         done = {}
         banks = []
@@ -4084,6 +4715,67 @@ class Parser(object):
             bank = items[0]
             bank.set_names(names)
 
+    def set_mmap(self, flag):
+        self._mmap = flag
+
+    # passes chunks and HIRC items to the streamer once parsed, which may discard them
+    # (banks are parsed one by one and aren't cached)
+    def set_streamer(self, streamer):
+        self._streamer = streamer
+
+    # number of processes used to parse banks (0 = one per CPU)
+    def set_jobs(self, jobs):
+        if jobs is None:
+            jobs = 1
+        if jobs <= 0:
+            jobs = os.cpu_count() or 1
+        self._jobs = jobs
+
+    # number of processes used to parse HIRC items of big banks (0 = one per CPU), when
+    # banks aren't parsed in multiple processes already
+    def set_hirc_jobs(self, jobs):
+        if jobs is None:
+            jobs = 1
+        if jobs <= 0:
+            jobs = os.cpu_count() or 1
+        self._hirc_jobs = jobs
+
+    def set_lazy(self, flag):
+        self._lazy = flag
+
+    # records parse stats, reported after parsing banks (and saved to outname if set)
+    def set_profiler(self, flag, outname=None):
+        if not flag:
+            self._profiler = None
+            return
+        self._profiler = wprofiler.ParseProfiler()
+        self._profiler_outname = outname
+
+    # parses banks with the same data once (aliases reuse its tree)
+    def set_unique(self, flag):
+        self._unique = flag
+
+    # parses only parts of banks needed for some use (see PARSE_PROFILES)
+    def set_profile(self, profile):
+        if profile == PROFILE_FULL:
+            profile = None
+        if profile and profile not in PARSE_PROFILES:
+            raise ValueError("unknown parse profile %s" % (profile))
+        self._profile = profile
+
+    def set_compact(self, flag):
+        self._compact = flag
+
+    def set_indexed(self, flag):
+        self._indexed = flag
+
+    # saves/loads parsed banks to/from dir (or next to banks if not set)
+    def set_cache(self, flag, path=None):
+        if not flag:
+            self._cache = None
+            return
+        self._cache = wcache.BankCache(path)
+
     #def set_ignore_version(self, value):
     #    self._ignore_version = value
 
@@ -193,19 +193,53 @@ class AkClass:
 
     # ##########
 
+# Vtables only depend on bank version and class, so they are set up once per version (per
+# process) and copied to new objects, rather than redoing the inheritance chain each time.
+_vtables = {}
+
+def _new_class(obj, name, inherit=None, *args):
+    key = (wparser.get_version(obj), name)
+    vtable = _vtables.get(key)
+    if vtable is None:
+        cls = AkClass(obj, name)
+        if inherit:
+            inherit(cls, *args)
+        _vtables[key] = dict(cls.__dict__)
+        return cls
+
+    cls = AkClass.__new__(AkClass)
+    cls.__dict__.update(vtable)
+    return cls
+
 def CAkState__Create(obj):
     #CAkState::Create
-    cls = AkClass(obj, CAkState)
-    return cls
+    return _new_class(obj, CAkState)
 
 def CAkSound__Create(obj):
     #CAkSound::Create
-    cls = AkClass(obj, CAkSound)
-    cls.CAkParameterNode()
-    return cls
+    return _new_class(obj, CAkSound, AkClass.CAkParameterNode)
 
 def CAkAction__Create(obj, actionType):
     #CAkAction::Create
+    version = wparser.get_version(obj)
+    action_types, action_mask, action_dispatch = _get_action_tables(version)
+
+    name = action_types.get(actionType & action_mask)
+    if name is None:
+        raise wmodel.ParseError("Unknown action type %05x " % (actionType), obj)
+
+    dispatch = action_dispatch.get(name)
+    if dispatch:
+        return _new_class(obj, name, AkClass.CAkAction, *dispatch)
+    return _new_class(obj, name)
+
+# action tables for a version, made once (per process)
+_action_tables = {}
+
+def _get_action_tables(version):
+    tables = _action_tables.get(version)
+    if tables:
+        return tables
 
     # giant switch in CAkAction::Create
     # (some don't exist in earlier versions but no apparent type reuse)
@@ -291,19 +325,15 @@ def CAkAction__Create(obj, actionType):
         0x1B00: CAkActionTrigger,
     }
 
-    version = wparser.get_version(obj)
     if version >= 150:
         CAkAction_ActionTypes_072.update(CAkAction_ActionTypes_150_changes)
 
     if   version <= 56:
-        name = CAkAction_ActionTypes_056.get(actionType & 0xFF000)
+        action_types = CAkAction_ActionTypes_056
+        action_mask = 0xFF000
     else:
-        name = CAkAction_ActionTypes_072.get(actionType & 0xFF00)
-
-    if name is None:
-        raise wmodel.ParseError("Unknown action type %05x " % (actionType), obj)
-
-    cls = AkClass(obj, name)
+        action_types = CAkAction_ActionTypes_072
+        action_mask = 0xFF00
 
     CAkAction_dispatch = {
         CAkActionStop: (wparser.CAkActionActive__SetActionParams, wparser.CAkActionStop__SetActionSpecificParams),
@@ -335,148 +365,111 @@ def CAkAction__Create(obj, actionType):
         CAkActionPlayEventUnknown: (wparser.CAkActionPlay__SetActionParams, wparser.CAkAction__SetActionSpecificParams),
     }
 
-    if   cls.version == 26:
+    if   version == 26:
         CAkAction_dispatch.update({
             # extends from CAkActionSetLFE (062 from CAkActionSetAkProp and 053 from CAkAction)
             CAkActionSetVolume: (wparser.CAkActionSetValue__SetActionParams, wparser.CAkActionSetAkProp__SetActionSpecificParams),
         })
 
 
-    if   cls.version == 56:
+    if   version == 56:
         CAkAction_dispatch.update({
             # extends from CAkActionSetLFE (062 from CAkActionSetAkProp and 053 from CAkAction)
             CAkActionUseState: (wparser.CAkActionSetValue__SetActionParams, wparser.CAkAction__SetActionSpecificParams),
         })
 
-    if   cls.version <= 122:
+    if   version <= 122:
         CAkAction_dispatch.update({
             CAkActionStop: (wparser.CAkActionActive__SetActionParams, wparser.CAkAction__SetActionSpecificParams),
         })
 
-    dispatch = CAkAction_dispatch.get(cls.name)
-    if dispatch:
-        cls.CAkAction(*dispatch)
-    return cls
+    tables = (action_types, action_mask, CAkAction_dispatch)
+    _action_tables[version] = tables
+    return tables
 
 def CAkEvent__Create(obj):
     #CAkEvent::Create
-    cls = AkClass(obj, CAkEvent)
-    return cls
+    return _new_class(obj, CAkEvent)
 
 def CAkRanSeqCntr__Create(obj):
     #CAkRanSeqCntr::Create
-    cls = AkClass(obj, CAkRanSeqCntr)
-    cls.CAkParameterNode()
-    return cls
+    return _new_class(obj, CAkRanSeqCntr, AkClass.CAkParameterNode)
 
 def CAkSwitchCntr__Create(obj):
     #CAkSwitchCntr::Create
-    cls = AkClass(obj, CAkSwitchCntr)
-    cls.CAkParameterNode()
-    return cls
+    return _new_class(obj, CAkSwitchCntr, AkClass.CAkParameterNode)
 
 def CAkActorMixer__Create(obj):
     #CAkActorMixer::Create
-    cls = AkClass(obj, CAkActorMixer)
-    cls.CAkParameterNode()
-    return cls
+    return _new_class(obj, CAkActorMixer, AkClass.CAkParameterNode)
 
 def CAkBus__Create(obj):
     #CAkBus::Create
-    cls = AkClass(obj, CAkBus)
-    cls.CAkBus()
-    return cls
+    return _new_class(obj, CAkBus, AkClass.CAkBus)
 
 def CAkLayerCntr__Create(obj):
     #CAkLayerCntr::Create
-    cls = AkClass(obj, CAkLayerCntr)
-    cls.CAkParameterNode()
-    return cls
+    return _new_class(obj, CAkLayerCntr, AkClass.CAkParameterNode)
 
 def CAkMusicSegment__Create(obj):
     #CAkMusicSegment::Create
-    cls = AkClass(obj, CAkMusicSegment)
-    cls.CAkParameterNode()
-    return cls
+    return _new_class(obj, CAkMusicSegment, AkClass.CAkParameterNode)
 
 def CAkMusicTrack__Create(obj):
     #CAkMusicTrack::Create
-    cls = AkClass(obj, CAkMusicTrack)
-    cls.CAkParameterNode()
-    return cls
+    return _new_class(obj, CAkMusicTrack, AkClass.CAkParameterNode)
 
 def CAkMusicSwitchCntr__Create(obj):
     #CAkMusicSwitchCntr::Create
-    cls = AkClass(obj, CAkMusicSwitchCntr)
-    cls.CAkParameterNode()
-    return cls
+    return _new_class(obj, CAkMusicSwitchCntr, AkClass.CAkParameterNode)
 
 def CAkMusicRanSeqCntr__Create(obj):
     #CAkMusicRanSeqCntr::Create
-    cls = AkClass(obj, CAkMusicRanSeqCntr)
-    cls.CAkParameterNode()
-    return cls
+    return _new_class(obj, CAkMusicRanSeqCntr, AkClass.CAkParameterNode)
 
 def CAkAttenuation__Create(obj):
     #CAkAttenuation::Create
-    cls = AkClass(obj, CAkAttenuation)
-    return cls
+    return _new_class(obj, CAkAttenuation)
 
 def CAkDialogueEvent__Create(obj):
     #CAkDialogueEvent::Create
-    cls = AkClass(obj, CAkDialogueEvent)
-    return cls
+    return _new_class(obj, CAkDialogueEvent)
 
 def CAkFeedbackNode__Create(obj):
     #CAkFeedbackNode::Create
-    cls = AkClass(obj, CAkFeedbackNode)
-    cls.CAkParameterNode()
-    return cls
+    return _new_class(obj, CAkFeedbackNode, AkClass.CAkParameterNode)
 
 def CAkFeedbackBus__Create(obj):
     #CAkFeedbackBus::Create
-    cls = AkClass(obj, CAkFeedbackBus)
-    cls.CAkBus()
-    return cls
+    return _new_class(obj, CAkFeedbackBus, AkClass.CAkBus)
 
 def CAkFxShareSet__Create(obj):
     #CAkFxShareSet::Create
-    cls = AkClass(obj, CAkFxShareSet)
-    cls.CAkStateAware()
-    return cls
+    return _new_class(obj, CAkFxShareSet, AkClass.CAkStateAware)
 
 def CAkFxCustom__Create(obj):
     #CAkFxCustom::Create
-    cls = AkClass(obj, CAkFxCustom)
-    cls.CAkStateAware()
-    return cls
+    return _new_class(obj, CAkFxCustom, AkClass.CAkStateAware)
 
 def CAkAuxBus__Create(obj):
     #CAkAuxBus::Create
-    cls = AkClass(obj, CAkAuxBus)
-    cls.CAkBus()
-    return cls
+    return _new_class(obj, CAkAuxBus, AkClass.CAkBus)
 
 def CAkLFOModulator__Create(obj):
     #CAkLFOModulator::Create
-    cls = AkClass(obj, CAkLFOModulator)
-    return cls
+    return _new_class(obj, CAkLFOModulator)
 
 def CAkEnvelopeModulator__Create(obj):
     #CAkEnvelopeModulator::Create
-    cls = AkClass(obj, CAkEnvelopeModulator)
-    return cls
+    return _new_class(obj, CAkEnvelopeModulator)
 
 def CAkAudioDevice__Create(obj):
     #CAkAudioDevice::Create
-    cls = AkClass(obj, CAkAudioDevice)
-    cls.CAkStateAware()
-    return cls
+    return _new_class(obj, CAkAudioDevice, AkClass.CAkStateAware)
 
 def CAkTimeModulator__Create(obj):
     #CAkTimeModulator::Create
-    cls = AkClass(obj, CAkTimeModulator)
-    return cls
+    return _new_class(obj, CAkTimeModulator)
 
 
 # #############################################################################
@@ -0,0 +1,127 @@
+import logging, json, time
+from . import wmodel
+
+
+# Parse stats per chunk tag and HIRC class (see Parser.set_profiler), to find out which parts
+# of a bank are slow to parse. Times include children (the HIRC chunk includes its items) but not
+# the time spent counting nodes, and node counts are of nodes actually created (lazy parts and
+# bulk records aren't counted until loaded). Actions are listed per action type, as their class depends on it.
+
+class ProfilerStats(object):
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.count = 0
+        self.time = 0.0
+        self.bytes = 0
+        self.objects = 0
+        self.fields = 0
+        self.lists = 0
+        self.list_max = 0
+
+    def get_item(self):
+        return {
+            'kind': self.kind,
+            'name': self.name,
+            'count': self.count,
+            'time': round(self.time, 6),
+            'bytes': self.bytes,
+            'objects': self.objects,
+            'fields': self.fields,
+            'lists': self.lists,
+            'list_max': self.list_max,
+        }
+
+
+class ParseProfiler(object):
+    KIND_CHUNK = 'chunk'
+    KIND_HIRC = 'hirc'
+
+    def __init__(self):
+        self._stats = {}
+        self._banks = 0
+        self._counting = 0.0 #time spent counting nodes, not part of parse times
+
+    # returns a start mark for done()
+    def start(self, r):
+        return (time.perf_counter(), r.current(), self._counting)
+
+    def done(self, kind, node, r, mark):
+        # done() calls of items inside this one (like HIRC items in the HIRC chunk) count nodes
+        # while this is timed, so that is removed
+        elapsed = time.perf_counter() - mark[0] - (self._counting - mark[2])
+        size = r.current() - mark[1]
+
+        if kind == self.KIND_CHUNK:
+            name = self._get_chunk_name(node)
+        else:
+            name = node.get_name()
+
+        key = (kind, name)
+        stats = self._stats.get(key)
+        if not stats:
+            stats = ProfilerStats(kind, name)
+            self._stats[key] = stats
+
+        stats.count += 1
+        stats.time += elapsed
+        stats.bytes += size
+
+        start = time.perf_counter()
+        self._add_nodes(stats, node)
+        self._counting += time.perf_counter() - start
+
+    def add_bank(self):
+        self._banks += 1
+
+    def _get_chunk_name(self, node):
+        ntag = node.find1(name='dwTag')
+        if not ntag:
+            return '?'
+        tag = ntag.value()
+        if isinstance(tag, bytes):
+            tag = tag.decode('utf-8', 'replace')
+        return tag
+
+    def _add_nodes(self, stats, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, wmodel.NodeField):
+                stats.fields += 1
+                continue
+            if isinstance(node, wmodel.NodeObject):
+                stats.objects += 1
+            elif isinstance(node, wmodel.NodeList):
+                stats.lists += 1
+                stats.list_max = max(stats.list_max, node.get_count() or 0)
+                if not node.is_loaded():
+                    continue
+
+            children = node.get_loaded_children()
+            if children:
+                stack.extend(children)
+
+    def get_stats(self):
+        return sorted(self._stats.values(), key=lambda stats: stats.time, reverse=True)
+
+    def report(self, outname=None):
+        items = self.get_stats()
+        if not items:
+            return
+
+        logging.info("profiler: %i banks", self._banks)
+        logging.info("profiler: %-5s %-40s %8s %9s %11s %9s %10s %8s", 'kind', 'name', 'count', 'time', 'bytes', 'objects', 'fields', 'list max')
+        for stats in items:
+            logging.info("profiler: %-5s %-40s %8i %8.3fs %11i %9i %10i %8i",
+                stats.kind, stats.name, stats.count, stats.time, stats.bytes, stats.objects, stats.fields, stats.list_max)
+
+        if not outname:
+            return
+        logging.info("profiler: writting %s" % (outname))
+        report = {
+            'banks': self._banks,
+            'items': [stats.get_item() for stats in items],
+        }
+        with open(outname, 'w', encoding='utf-8') as outfile:
+            json.dump(report, outfile, indent=1)
@@ -0,0 +1,162 @@
+import re, functools
+
+
+# Simple path queries over nodes, ex. "HircChunk/listLoadedItem/CAkSound[ulID=123]/AkBankSourceData".
+# Each step matches direct children by name ('*' for any, '**' for any depth, including current
+# nodes), plus optional filters:
+# - [name=value]: has a direct child named 'name' with that value
+# - [name]: has a direct child named 'name'
+# - [@attr=value]: node's own attr has that value (ex. [@type=sid], [@index=0])
+# Values match a node's value, hashname or formatted value (also just the name in "0x02 [Sound]").
+# Queries are compiled once and cached (recent ones only, as the viewer allows free text queries),
+# and only step through children (no full tree search).
+
+_STEP_PATTERN = re.compile(r'^(\*\*|\*|[^\[\]]+)((?:\[[^\[\]]*\])*)$')
+_FILTER_PATTERN = re.compile(r'\[(@?)([^=\[\]]+)(=([^\[\]]*))?\]')
+
+_QUERIES_MAX = 256
+
+
+@functools.lru_cache(maxsize=_QUERIES_MAX)
+def compile(expr):
+    return NodeQuery(expr)
+
+
+class NodeQuery(object):
+    def __init__(self, expr):
+        self.expr = expr
+        self.steps = []
+
+        for part in self._split(expr):
+            match = _STEP_PATTERN.match(part)
+            if not match:
+                raise ValueError("bad query step '%s' in '%s'" % (part, expr))
+            name, filters_text = match.groups()
+
+            filters = []
+            for is_attr, key, has_value, value in _FILTER_PATTERN.findall(filters_text):
+                if not has_value:
+                    value = None
+                filters.append((bool(is_attr), key.strip(), value))
+            self.steps.append((name.strip(), filters))
+
+        if not self.steps:
+            raise ValueError("empty query")
+
+    # splits by '/' outside filters, as values may be paths
+    def _split(self, expr):
+        parts = []
+        depth = 0
+        current = ''
+        for c in expr:
+            if c == '[':
+                depth += 1
+            elif c == ']':
+                depth -= 1
+            elif c == '/' and depth == 0:
+                parts.append(current)
+                current = ''
+                continue
+            current += c
+        parts.append(current)
+        return [part for part in parts if part.strip()]
+
+    def run(self, node):
+        nodes = [node]
+        for name, filters in self.steps:
+            if name == '**':
+                nodes = self._get_descendants(nodes)
+            else:
+                nodes = self._get_children(nodes, name)
+
+            if filters:
+                nodes = [node for node in nodes if self._is_match(node, filters)]
+            if not nodes:
+                break
+        return nodes
+
+    def _get_children(self, nodes, name):
+        items = []
+        for node in nodes:
+            children = node.get_children()
+            if not children:
+                continue
+            if name == '*':
+                items.extend(children)
+                continue
+            for child in children:
+                if child.get_attr('name') == name:
+                    items.append(child)
+        return items
+
+    # nodes and all their subnodes, in tree order (once each)
+    def _get_descendants(self, nodes):
+        items = []
+        done = set()
+        for node in nodes:
+            stack = [node]
+            while stack:
+                subnode = stack.pop()
+                if id(subnode) in done:
+                    continue
+                done.add(id(subnode))
+                items.append(subnode)
+
+                children = subnode.get_children()
+                if children:
+                    stack.extend(reversed(children))
+        return items
+
+    def _is_match(self, node, filters):
+        for is_attr, key, value in filters:
+            if is_attr:
+                if not self._is_value(node, node.get_attr(key), value):
+                    return False
+                continue
+
+            children = node.get_children()
+            if not children:
+                return False
+
+            found = False
+            for child in children:
+                if child.get_attr('name') != key:
+                    continue
+                if value is None or self._is_value(child, child.get_attr('value'), value):
+                    found = True
+                    break
+            if not found:
+                return False
+
+        return True
+
+    def _is_value(self, node, attr, value):
+        if value is None:
+            return attr is not None
+        if attr is None:
+            return False
+
+        if str(attr) == value:
+            return True
+        if isinstance(attr, int):
+            try:
+                if int(value, 0) == attr:
+                    return True
+            except ValueError:
+                pass
+
+        hashname = node.get_attr('hashname')
+        if hashname and hashname == value:
+            return True
+
+        valuefmt = node.get_attr('valuefmt')
+        if valuefmt:
+            if valuefmt == value:
+                return True
+            # LUT formats: "0x02 [Sound]"
+            if valuefmt.endswith(']') and '[' in valuefmt:
+                label = valuefmt[valuefmt.rindex('[') + 1 : -1]
+                if label == value:
+                    return True
+
+        return False
@@ -0,0 +1,46 @@
+import logging
+
+
+# Quick info of a bank from its header and chunk list (see Parser.scan_banks), so big sets of
+# banks can be checked or filtered without parsing them fully.
+
+class BankInfo(object):
+    def __init__(self, filename, size):
+        self.filename = filename
+        self.size = size
+        self.version = None
+        self.sid = None
+        self.lang = None
+        self.feedback = False
+        self.chunks = [] # (fourcc, size)
+        self.hirc_count = None
+        self.media_count = None
+
+    def get_chunk_names(self):
+        return [tag.decode('utf-8', 'replace') for tag, _ in self.chunks]
+
+
+def write_inventory(infos, outname):
+    if not infos:
+        return
+    logging.info("scanner: writting %s" % (outname))
+
+    lines = []
+    lines.append("#filename\tsid\tlang\tversion\tsize\tfeedback\thirc\tmedia\tchunks")
+    for info in infos:
+        items = [
+            info.filename,
+            info.sid,
+            info.lang,
+            info.version,
+            info.size,
+            int(bool(info.feedback)),
+            info.hirc_count,
+            info.media_count,
+            ' '.join(info.get_chunk_names()),
+        ]
+        lines.append('\t'.join(['' if item is None else str(item) for item in items]))
+
+    with open(outname, 'w', encoding='utf-8') as outfile:
+        outfile.write('\n'.join(lines) + '\n')
+    logging.info("scanner: done")
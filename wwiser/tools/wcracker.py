@@ -0,0 +1,212 @@
+import logging, os, re
+from concurrent import futures
+from .. import wlogs
+
+
+# Searches names for IDs that are missing in loaded banks, by combining words from a list
+# (word, word_word, word_word_123, etc) and writing hits to wwnames.txt. FNV is a hash of each
+# byte in order, so names that share a start (a "prefix" like "play_bgm_") are hashed once and
+# continued for each word. FNV steps can also be reversed (xor + multiply by the inverse prime),
+# so instead of hashing every prefix + last part, each missing ID is "unhashed" back through each
+# last part once, and each prefix is checked in that table with a single lookup.
+#
+# The 32-bit hash is small, so with many missing IDs and big lists some hits will be false
+# positives (wrong names with the same ID) and must be checked manually.
+
+_FNV_BASIS = 2166136261
+_FNV_PRIME = 16777619
+_FNV_PRIME_INV = pow(_FNV_PRIME, -1, 1 << 32)
+_FNV_MASK = 0xFFFFFFFF
+
+_TABLE_MAX = 2000000 #max missing IDs x last parts in unhash table (otherwise hashes last parts)
+_TASK_WORDS = 16 #first words per task
+
+
+def _hash(hash, data):
+    for byte in data:
+        hash = ((hash * _FNV_PRIME) ^ byte) & _FNV_MASK
+    return hash
+
+def _unhash(hash, data):
+    for byte in reversed(data):
+        hash = ((hash ^ byte) * _FNV_PRIME_INV) & _FNV_MASK
+    return hash
+
+
+# Search state, made once per process (tables may be big so they aren't passed per task).
+class _Search(object):
+    def __init__(self, ids, words, separators, numbers, depth):
+        self.ids = ids
+        self.depth = depth
+        self.words = [(word, word.encode('utf-8')) for word in words]
+        self.separators = [(sep, sep.encode('utf-8')) for sep in separators]
+
+        # last parts added to prefixes: another word (up to depth) and/or a number (on top of depth)
+        word_tails = []
+        number_tails = []
+        for sep in separators:
+            if depth > 1:
+                word_tails += [sep + word for word in words]
+            number_tails += [sep + number for number in numbers]
+        self.word_tails, self.word_table = self._get_tails(word_tails)
+        self.number_tails, self.number_table = self._get_tails(number_tails)
+
+    def _get_tails(self, tails):
+        tails = [(tail, tail.encode('utf-8')) for tail in tails]
+        if not tails or len(self.ids) * len(tails) > _TABLE_MAX:
+            return tails, None
+
+        table = {}
+        for id in self.ids:
+            for tail, data in tails:
+                table.setdefault(_unhash(id, data), []).append((id, tail))
+        return tails, table
+
+    def search(self, indexes):
+        hits = []
+        for index in indexes:
+            word, data = self.words[index]
+            if word[0].isdigit(): #names can't start with numbers
+                continue
+            self._search_prefix(_hash(_FNV_BASIS, data), word, 1, hits)
+        return hits
+
+    def _search_prefix(self, hash, text, parts, hits):
+        # longer prefixes were already checked as shorter prefix + word tail
+        if parts == 1 and hash in self.ids:
+            hits.append((hash, text))
+
+        self._search_tails(hash, text, self.number_tails, self.number_table, hits)
+        if parts < self.depth:
+            self._search_tails(hash, text, self.word_tails, self.word_table, hits)
+
+        # longer prefixes (last word is added as a tail, unless numbers go after it)
+        if parts + 1 > self.depth or parts + 1 == self.depth and not self.number_tails:
+            return
+        for sep, sepdata in self.separators:
+            hash_sep = _hash(hash, sepdata)
+            for word, data in self.words:
+                self._search_prefix(_hash(hash_sep, data), text + sep + word, parts + 1, hits)
+
+    def _search_tails(self, hash, text, tails, table, hits):
+        if table is not None:
+            for id, tail in table.get(hash, ()):
+                hits.append((id, text + tail))
+            return
+        for tail, data in tails:
+            id = _hash(hash, data)
+            if id in self.ids:
+                hits.append((id, text + tail))
+
+
+# jobs use a copy of the search made when starting each process
+_job_search = None
+
+def _init_job(ids, words, separators, numbers, depth):
+    global _job_search
+    if not logging.root.handlers:
+        wlogs.setup_cli_logging()
+    _job_search = _Search(ids, words, separators, numbers, depth)
+
+def _search_job(indexes):
+    return _job_search.search(indexes)
+
+
+class Cracker(object):
+    SEPARATORS = ['_', '']
+
+    def __init__(self, names):
+        self._names = names
+        self._words = []
+        self._depth = 2
+        self._numbers = []
+        self._jobs = 1
+
+    # words in a text file (any non-FNV chars split words, so strings dumps and scripts are ok too)
+    def load_words(self, filename):
+        if not os.path.isfile(filename):
+            logging.info("cracker: couldn't find %s word list", filename)
+            return
+
+        pattern = re.compile(r'[^a-z0-9_]+')
+        words = {}
+        with open(filename, 'r', encoding='utf-8', errors='ignore') as infile:
+            for line in infile:
+                if line.startswith('#'):
+                    continue
+                for word in pattern.split(line.lower()):
+                    if word and len(word) <= 50:
+                        words[word] = True
+        self._words = list(words)
+        logging.info("cracker: loaded %i words", len(self._words))
+
+    # max words combined in a name
+    def set_depth(self, depth):
+        if depth is None or depth < 1:
+            depth = 2
+        self._depth = depth
+
+    # adds numbers 0..N-1 after names (also zero-padded: "1", "01")
+    def set_numbers(self, count):
+        numbers = {}
+        if count:
+            width = len(str(count - 1))
+            for i in range(count):
+                numbers[str(i)] = True
+                numbers[str(i).zfill(width)] = True
+        self._numbers = list(numbers)
+
+    def set_jobs(self, jobs):
+        if jobs is None:
+            jobs = 1
+        if jobs <= 0:
+            jobs = os.cpu_count() or 1
+        self._jobs = jobs
+
+    # returns found names as id > [names]
+    def crack(self):
+        ids = self._names.get_missing_ids()
+        if not ids or not self._words:
+            logging.info("cracker: no missing IDs or words")
+            return {}
+        logging.info("cracker: searching %i missing IDs with %i words (depth %i, %i numbers)",
+            len(ids), len(self._words), self._depth, len(self._numbers))
+
+        params = (ids, self._words, self.SEPARATORS, self._numbers, self._depth)
+        tasks = [range(start, min(start + _TASK_WORDS, len(self._words))) for start in range(0, len(self._words), _TASK_WORDS)]
+
+        results = {}
+        if self._jobs > 1 and len(tasks) > 1:
+            jobs = min(self._jobs, len(tasks))
+            with futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_job, initargs=params) as executor:
+                for hits in executor.map(_search_job, tasks):
+                    self._add_hits(results, hits)
+        else:
+            search = _Search(*params)
+            for task in tasks:
+                self._add_hits(results, search.search(task))
+
+        logging.info("cracker: found %i names for %i IDs", sum([len(items) for items in results.values()]), len(results))
+        return results
+
+    def _add_hits(self, results, hits):
+        for id, name in hits:
+            items = results.setdefault(id, [])
+            if name not in items:
+                items.append(name)
+
+    # appends hits to a wwnames.txt (alts marked like when saving lists)
+    def save(self, results, outname):
+        if not results:
+            return
+        logging.info("cracker: saving %s", outname)
+
+        lines = ['', '### CRACKED NAMES (check for false positives)']
+        for id in sorted(results):
+            names = sorted(results[id])
+            lines.append(names[0])
+            for name in names[1:]:
+                lines.append('%s #alt' % (name))
+
+        with open(outname, 'a', encoding='utf-8') as outfile:
+            outfile.write('\n'.join(lines) + '\n')
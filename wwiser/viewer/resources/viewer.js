@@ -5,6 +5,7 @@ function Viewer() {
     this.load_simple = load_simple;
     this.load_simple_all = load_simple_all;
     this.load_node = load_node;
+    this.query_nodes = query_nodes;
     this.load_docs_readme = load_docs_readme;
     this.load_docs_wwiser = load_docs_wwiser;
 
@@ -27,6 +28,9 @@ function Viewer() {
     function load_node(id, on_success) {
         get_ajax('/load-node?id='+id, on_success);
     }
+    function query_nodes(query, on_success) {
+        get_ajax('/query-nodes?q='+encodeURIComponent(query), on_success);
+    }
     function load_docs_readme(on_success) {
         get_ajax('/load-docs?doc=readme', on_success);
     }
@@ -181,6 +185,17 @@ function Viewer() {
                 return;
             }
 
+            if (tgt.matches('.query-nodes')) {
+                var query = vbank.tools.querySelector('.query').value;
+                if (!query)
+                    return;
+
+                viewer.query_nodes(query, function(res) {
+                    load_items(vbank, res);
+                });
+                return;
+            }
+
             if (tgt.matches('.closable > .head')) {
                 var obj = tgt.parentNode;
                 if (obj.matches('.js-load-node')) {
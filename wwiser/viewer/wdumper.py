@@ -35,6 +35,7 @@ class DumpPrinter(object):
         self._formatted = False
         self._smaller = False
         self._hide = False
+        self._stack = None
 
 
     def dump(self):
@@ -86,6 +87,146 @@ class DumpPrinter(object):
             self._file = None
         logging.info("dumper: done")
 
+    #--------------------------------------------------------------------------
+
+    # Streaming mode: banks are printed while being parsed (see Parser.set_streamer), passing
+    # finished chunks and HIRC items that are written then removed from the tree, so memory
+    # stays about the same regardless of bank size. Parent nodes are opened on first use and
+    # closed once the bank is done. Output is the same as a regular dump, but since names
+    # are needed as banks are parsed, names stored in banks (STID) aren't used.
+
+    def is_streamable(self):
+        return self._type in [TYPE_TXT, TYPE_XML, TYPE_XSL, TYPE_XSL_SMALLER]
+
+    def start_stream(self):
+        if self._type == TYPE_TXT:
+            outname = self._make_name(".txt")
+        else:
+            if self._type == TYPE_XSL_SMALLER:
+                self._smaller = True
+                self._hide = True
+            if self._type in [TYPE_XSL, TYPE_XSL_SMALLER]:
+                self._formatted = True
+            outname = self._make_name(".xml")
+
+        logging.info("dumper: streaming %s" % (outname))
+        self._file = open(outname, 'w', encoding='utf-8')
+        self._stack = []
+
+        if self._formatted:
+            text = wloader.Loader.get_resource_text('resources/stylesheet.1.xsl')
+            self._file.write(text)
+
+    def end_stream(self):
+        if self._formatted:
+            text = wloader.Loader.get_resource_text('resources/stylesheet.2.xsl')
+            self._file.write(text)
+
+        self._file.close()
+        self._file = None
+        self._stack = None
+        logging.info("dumper: done")
+
+    # writes a finished node, plus pending parents and previous siblings
+    def stream_node(self, node):
+        # already opened when passing its children
+        for entry in self._stack:
+            if entry[0] is node:
+                while self._stack[-1][0] is not node:
+                    self._stream_close()
+                self._stream_close()
+                return
+
+        path = []
+        parent = node.get_parent()
+        while parent is not None:
+            path.append(parent)
+            parent = parent.get_parent()
+        path.reverse()
+
+        # close nodes from a previous branch
+        opened = 0
+        while opened < len(self._stack) and opened < len(path) and self._stack[opened][0] is path[opened]:
+            opened += 1
+        while len(self._stack) > opened:
+            self._stream_close()
+
+        for subnode in path[opened:]:
+            index = None
+            if self._stack:
+                index = self._stream_children(subnode)
+            self._stream_open(subnode, index)
+
+        index = self._stream_children(node)
+        entry = self._stack[-1]
+        self._stream_print(node, entry[1], index)
+        self._stream_remove(entry, 1)
+
+    # closes remaining nodes once the bank is done
+    def stream_bank(self, bank):
+        if not self._stack or self._stack[0][0] is not bank:
+            return
+        while self._stack:
+            self._stream_close()
+
+    def _stream_open(self, node, index):
+        depth = 0
+        if self._stack:
+            depth = self._stack[-1][1]
+
+        if self._type == TYPE_TXT:
+            subdepth = self._print_txt_head(node, depth, index)
+        else:
+            items = node.get_attr_items()
+            if isinstance(node, wmodel.NodeList) and node.get_count() is not None:
+                items = (('name', node.get_name()), ('count', node.get_count())) #may not be fully loaded yet
+            self._print_xml_head(node, items, depth, True)
+            subdepth = depth + 1
+        self._stack.append([node, subdepth, 0])
+
+    def _stream_close(self):
+        self._stream_children(None)
+        node, depth, _ = self._stack.pop()
+        if self._type != TYPE_TXT:
+            self._print_xml_tail(node, depth - 1)
+
+        if self._stack:
+            self._stream_remove(self._stack[-1], 1)
+
+    # prints and removes current children before target, returning target's index
+    def _stream_children(self, target):
+        entry = self._stack[-1]
+        node, depth, done = entry
+        is_list = isinstance(node, wmodel.NodeList)
+
+        count = 0
+        for subnode in node.get_children() or []:
+            if subnode is target:
+                break
+            index = done + count if is_list else None
+            self._stream_print(subnode, depth, index)
+            count += 1
+
+        self._stream_remove(entry, count)
+        if not is_list:
+            return None
+        return done + count
+
+    def _stream_remove(self, entry, count):
+        if not count:
+            return
+        children = entry[0].get_children()
+        del children[0:count]
+        entry[2] += count
+
+    def _stream_print(self, node, depth, index):
+        if self._type == TYPE_TXT:
+            self._print_txt_node(node, depth, index)
+        else:
+            self._print_xml_node(node, depth)
+
+    #--------------------------------------------------------------------------
+
     def write_empty(self):
         if not self._banks: #no banks loaded
             return
@@ -101,7 +242,7 @@ class DumpPrinter(object):
     #--------------------------------------------------------------------------
 
     def _print_empty_node(self, node):
-        __ = node.get_attrs() #forces names!
+        __ = node.get_attr_items() #forces names!
         children = node.get_children()
 
         if children:
@@ -124,16 +265,23 @@ class DumpPrinter(object):
             self._file.write(text)
 
     def _print_xml_node(self, node, depth):
-        just = '\t' * depth
-
-        nodename = node.get_nodename()
-        attrs = node.get_attrs().items()
+        items = node.get_attr_items()
         children = node.get_children()
         #text = node.get_text()
         has_children = children and len(children) > 0
 
+        self._print_xml_head(node, items, depth, has_children)
+        if has_children:
+            for subnode in children:
+                self._print_xml_node(subnode, depth + 1)
+            self._print_xml_tail(node, depth)
+
+    def _print_xml_head(self, node, items, depth, has_children):
+        just = '\t' * depth
+        nodename = node.get_nodename()
+
         line = ""
-        for key, val in attrs:
+        for key, val in items:
             if self._hide and key in self.attr_hide:
                 continue
             if self._formatted and key in self.attr_format:
@@ -151,17 +299,18 @@ class DumpPrinter(object):
 
         if not has_children:
             line = "%s<%s%s/>\n" % (just, nodename, line)
-            self._file.write(line)
         else:
             line = "%s<%s%s>\n" % (just, nodename, line)
-            self._file.write(line)
+        self._file.write(line)
 
-            depth += 1
-            for subnode in children:
-                self._print_xml_node(subnode, depth)
+    def _print_xml_tail(self, node, depth):
+        just = '\t' * depth
+        nodename = node.get_nodename()
+        if self._smaller and nodename in self.node_smaller:
+            nodename = self.node_smaller[nodename]
 
-            line = "%s</%s>\n" % (just, nodename)
-            self._file.write(line)
+        line = "%s</%s>\n" % (just, nodename)
+        self._file.write(line)
 
 
     def _print_txt(self):
@@ -169,40 +318,36 @@ class DumpPrinter(object):
             self._print_txt_node(bank, 0, 0)
 
     def _print_txt_node(self, node, depth, index):
-        just = ''.ljust(depth)
-        ojust = ''.ljust(8)
-
-        #nodename = node.get_nodename()
-        attrs = node.get_attrs()
         children = node.get_children()
         #text = node.get_text()
         has_children = children and len(children) > 0
 
-        line = None
-        if   isinstance(node, wmodel.NodeRoot):
-            type = "bank".ljust(4)
-            version = attrs['version']
-            filename = attrs['filename']
-            line = "%s  %s%s v%i %s" % (ojust, just, type, version, filename)
+        depth = self._print_txt_head(node, depth, index)
 
-        elif isinstance(node, wmodel.NodeObject):
-            type = "obj".ljust(4)
-            name = attrs['name']
-            if index is not None: #>=0
-                line = "%s  %s%s %s[%i]" % (ojust, just, type, name, index)
+        if has_children:
+            if   isinstance(node, wmodel.NodeList):
+                for index, subnode in enumerate(children):
+                    self._print_txt_node(subnode, depth, index)
             else:
-                line = "%s  %s%s %s" % (ojust, just, type, name)
+                for subnode in children:
+                    self._print_txt_node(subnode, depth, None)
 
-        elif isinstance(node, wmodel.NodeList):
-            type = "lst".ljust(4)
-            name = attrs['name']
-            line = "%s  %s%s %s" % (ojust, just, type, name)
+    # prints node's line and returns depth for children
+    def _print_txt_head(self, node, depth, index):
+        just = ' ' * depth
+        ojust = '        '
 
-        elif isinstance(node, wmodel.NodeField):
-            offset = attrs.get('offset')
-            type = attrs['type'].ljust(4)
-            name = attrs['name']
-            text = attrs.get('valuefmt', attrs['value'])
+        #nodename = node.get_nodename()
+
+        # node attrs are read directly (fields first as they are most common)
+        line = None
+        if   isinstance(node, wmodel.NodeField):
+            offset = node.get_offset()
+            type = node.get_type().ljust(4)
+            name = node.get_name()
+            text = node.get_valuefmt()
+            if text is None:
+                text = node.value()
 
             if offset:
                 offset = "%08x" % (offset)
@@ -210,18 +355,37 @@ class DumpPrinter(object):
                 offset = ''
             line = "%s  %s%s %s = %s" % (offset, just, type, name, text)
 
-            keys = ['hashname', 'guidname', 'objpath', 'path']
-            for key in keys:
-                value = attrs.get(key, None)
-                if value:
-                    line += " (%s)" % (value)
+            names = node.get_names()
+            if names:
+                hashname, guidname, path, objpath = names
+                for value in (hashname, guidname, objpath, path):
+                    if value:
+                        line += " (%s)" % (value)
+
+        elif isinstance(node, wmodel.NodeObject):
+            name = node.get_name()
+            if index is not None: #>=0
+                line = "%s  %sobj  %s[%i]" % (ojust, just, name, index)
+            else:
+                line = "%s  %sobj  %s" % (ojust, just, name)
+
+        elif isinstance(node, wmodel.NodeList):
+            name = node.get_name()
+            line = "%s  %slst  %s" % (ojust, just, name)
+
+        elif isinstance(node, wmodel.NodeRoot):
+            version = node.get_version()
+            filename = node.get_filename()
+            line = "%s  %sbank v%i %s" % (ojust, just, version, filename)
 
         elif isinstance(node, wmodel.NodeSkip):
+            attrs = node.get_attrs()
             offset = attrs['offset']
             size = attrs['size']
             line = "%08x  %s(skipped @0x%x)" % (offset, just, size)
 
         elif isinstance(node, wmodel.NodeError):
+            attrs = node.get_attrs()
             message = attrs['message']
             line = "%s  %s**error: %s" % (ojust, just, message)
 
@@ -229,11 +393,4 @@ class DumpPrinter(object):
             self._file.write(line + '\n')
             depth += 3
 
-
-        if has_children:
-            if   isinstance(node, wmodel.NodeList):
-                for index, subnode in enumerate(children):
-                    self._print_txt_node(subnode, depth, index)
-            else:
-                for subnode in children:
-                    self._print_txt_node(subnode, depth, None)
+        return depth
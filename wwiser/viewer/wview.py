@@ -1,4 +1,4 @@
-import logging, random, threading
+import logging, random, threading, html
 import webbrowser, http, http.server, socketserver
 from urllib import parse
 
@@ -8,6 +8,7 @@ from . import wtemplate, wloader, wmarkdown
 DEFAULT_PORT = 55123
 #URL_BASE = 'http://localhost:%i/'
 URL_MAIN = 'wwiser'
+QUERY_LIMIT = 500
 
 
 #******************************************************************************
@@ -154,7 +155,7 @@ class NodePrinter(object):
         nodeid = id(node)
         nodename = node.get_nodename()
         name = node.get_name()
-        attrs = node.get_attrs()
+        attrs = dict(node.get_attr_items()) #templates only need a plain dict
         children = node.get_children()
         body = ""
         extra = ""
@@ -197,6 +198,16 @@ class NodePrinter(object):
         msg = self._print_node(node)
         return msg
 
+    def write_query(self, node, expr, limit):
+        self.stopper = None
+        # writes nodes matching a path query (ex. "HircChunk/listLoadedItem/CAkSound"), up to a max
+        # as results may include big parts of the tree
+        nodes = node.query(expr)
+        msg = ''
+        for subnode in nodes[0:limit]:
+            msg += self._print_node(subnode)
+        return msg
+
 #******************************************************************************
 
 class ViewerHandler(http.server.BaseHTTPRequestHandler):
@@ -216,6 +227,7 @@ class ViewerHandler(http.server.BaseHTTPRequestHandler):
             '/wwiser': self.do_main,
             '/load-banks': self.do_load_banks,
             '/load-node': self.do_load_node,
+            '/query-nodes': self.do_query_nodes,
             '/load-docs': self.do_load_docs,
         }
         filetypes = {
@@ -350,6 +362,19 @@ class ViewerHandler(http.server.BaseHTTPRequestHandler):
         msg = self._printer.write_node(nodeid)
         self._output(bytes(msg, 'utf-8'))
 
+    def do_query_nodes(self):
+        params = parse.parse_qs(self.ppath.query)
+        expr = params.get('q')[0]
+
+        self._start_html()
+        try:
+            for node in self._parser.get_banks():
+                msg = self._printer.write_query(node, expr, QUERY_LIMIT)
+                self._output(bytes(msg, 'utf-8'))
+        except ValueError as e:
+            msg = "<div>%s</div>" % (html.escape(str(e)))
+            self._output(bytes(msg, 'utf-8'))
+
     def do_load_docs(self):
         docnames = {
             'readme': 'README.md',
@@ -1,11 +1,11 @@
 import sys, argparse, glob, logging, os, platform, shlex
 
-from . import wversion, wlogs, wtests
+from . import wversion, wlogs, wtests, wmemory
 from .names import wnames
-from .parser import wparser
+from .parser import wparser, wscanner
 from .viewer import wdumper, wview
 from .generator import wgenerator, wtags, wlocator
-from .tools import wcleaner
+from .tools import wcleaner, wcracker
 from . import wfnv
 
 
@@ -13,6 +13,7 @@ class Cli(object):
 
     def __init__(self):
         self._parser = None
+        self._memory = None
         return
 
     def _parse_init(self):
@@ -52,6 +53,8 @@ class Cli(object):
         #p.add_argument('-iv', '--ignore-version',      help="Ignore bank version check", action='store_true')
         p.add_argument('-sl', '--save-lst',             help="Clean wwnames.txt and include missing hashnames\n(needs dump set)", action='store_true')
         p.add_argument('-br', '--bank-repeat',          help="Override repeated banks handling:\n  manual / first / last / smallest / biggest / biggest+last")
+        p.add_argument('-bs', '--bank-scan',            help="Read bank headers first and skip ignored repeated banks\n(faster with many repeated banks)", action='store_true')
+        p.add_argument('-bi', '--bank-inventory',       help="Write bank headers info to (name).inventory.txt and stop", action='store_true')
 
         p = parser.add_argument_group('txtp options')
         p.add_argument('-g',  '--txtp',                 help="Generate TXTP", action='store_true')
@@ -95,10 +98,29 @@ class Cli(object):
         p.add_argument('-tw', '--tags-wem',             help="Make !tags.m3u for .wem in folder", action='store_true')
         p.add_argument('-ta', '--tags-add',             help="Add to existing !tags.m3u instead of overwritting", action='store_true')
         p.add_argument('-fc', '--file-cleaner',         help="Move .wem/bnk not used in .txtp to unused folder", action='store_true')
+        p.add_argument('-nk', '--names-crack',          help="Search names for missing IDs combining words in a list\n(adds hits to wwnames.txt, may include false positives)", metavar='WORDLIST')
+        p.add_argument('-nkd','--names-crack-depth',    help="Set max words per name when searching names (default: 2)\n(not counting numbers)", metavar='N', type=int)
+        p.add_argument('-nkn','--names-crack-numbers',  help="Also try names ending with numbers 0..N-1 when searching names", metavar='N', type=int)
+
+        p = parser.add_argument_group('performance options')
+        p.add_argument('-pm', '--parse-mmap',           help="Read banks through memory-mapped files\n(faster for big banks)", action='store_true')
+        p.add_argument('-j',  '--jobs',                 help="Parse banks in N processes (0=one per CPU)", metavar='N', type=int)
+        p.add_argument('-jh', '--jobs-hirc',            help="Parse HIRC items of big banks in N processes (0=one per CPU)\n(when not using --jobs)", metavar='N', type=int)
+        p.add_argument('-pl', '--parse-lazy',           help="Read bank objects on first use\n(faster with filters, otherwise same)", action='store_true')
+        p.add_argument('-pa', '--parse-arrays',         help="Keep bank fields in compact arrays\n(less memory, slower access)", action='store_true')
+        p.add_argument('-pu', '--parse-unique',         help="Parse banks with the same data once\n(faster with mirrored dirs)", action='store_true')
+        p.add_argument('-pp', '--parse-profile',        help="Parse only bank parts needed for some use\nfull|txtp|names|media (default: auto)", metavar='NAME', choices=list(wparser.PARSE_PROFILES))
+        p.add_argument('-pi', '--parse-index',          help="Index HIRC items on first search\n(faster .txtp generation, more memory while building)", action='store_true')
+        p.add_argument('-pc', '--parse-cache',          help="Save parsed banks/wwnames.txt and load them on next runs\n(as .wwcache, reparsed when files change)", action='store_true')
+        p.add_argument('-pcd', '--parse-cache-dir',     help="Set dir for --parse-cache files (default: next to banks)", metavar='DIR')
+        p.add_argument('-pr', '--parse-report',         help="Show parse time/size/nodes per chunk and HIRC class\n(also saved as .parse-report.json, parses without jobs)", action='store_true')
+        p.add_argument('-glm','--txtp-low-memory',      help="Free bank parts after reading them for .txtp\n(less memory, ignored with file cleaner)", action='store_true')
+        p.add_argument('-ds', '--dump-stream',          help="Write txt/xml dumps while parsing banks\n(less memory, ignores names in banks)", action='store_true')
 
         p = parser.add_argument_group('extra options (for testing)')
         p.add_argument('-nl', '--names-lst',            help="Set wwnames.txt companion file (default: auto)", metavar='NAME')
-        p.add_argument('-nd', '--names-db',             help="Set wwnames.db3 companion file (default: auto)", metavar='NAME')
+        p.add_argument('-nd', '--names-db',             help="Set wwnames.db3 or .wwstore companion file (default: auto)", metavar='NAME')
+        p.add_argument('-nc', '--names-compile',        help="Compile a wwnames.db3 or wwnames.txt to wwnames.wwstore and stop\n(memory-mapped, faster to load than the db)", metavar='NAME')
         p.add_argument('-sd', '--save-db',              help="Save/update wwnames.db3 with hashnames used in fields\n(needs dump set, or save-all)", action='store_true')
         p.add_argument('-gm', '--txtp-move',            help="Move all .wem referenced in loaded banks to wem dir", action='store_true')
 
@@ -107,6 +129,7 @@ class Cli(object):
         p.add_argument('-gxpp','--txtp-x-prefilter-paths',  help="Prefilter unreachable paths (for games with huge trees)", action='store_true')
         p.add_argument('-gxnl','--txtp-x-noloops',     help="Extra: don't loop sounds", action='store_true')
         p.add_argument('-gxni','--txtp-x-nameid',      help="Extra: add ID to generic names", action='store_true')
+        p.add_argument('-mr','--mem-report',            help="Show memory used after parsing/names/dump/txtp\n(also saved as .mem-report.json, much slower)", action='store_true')
         p.add_argument('-x','--tests',                 help="Extra: debug", action='store_true')
 
         self._parser = parser
@@ -209,6 +232,10 @@ class Cli(object):
         logging.info("%s (python %s)", title, platform.python_version())
 
 
+        if args.names_compile:
+            wnames.Names().save_store(args.names_compile)
+            return
+
         # get expanded list
         fnv = wfnv.Fnv()
         filenames = []
@@ -266,18 +293,6 @@ class Cli(object):
 
     def _execute(self, args, filenames):
 
-        # process banks
-        parser = wparser.Parser()
-        #parser.set_ignore_version(args.ignore_version)
-        parser.parse_banks(filenames)
-        banks = parser.get_banks(args.bank_repeat)
-
-
-        # load names
-        names = wnames.Names()
-        names.parse_files(banks, parser.get_filenames(), lst=args.names_lst, db=args.names_db)
-        parser.set_names(names)
-
         # dump files
         dump_name = args.dump_name
         if not dump_name:
@@ -286,9 +301,27 @@ class Cli(object):
             else:
                 dump_name = 'banks'
 
+        self._memory = None
+        if args.mem_report:
+            self._memory = wmemory.MemoryReport()
+            self._memory.start()
+        try:
+            self._execute_main(args, filenames, dump_name)
+        finally:
+            if self._memory:
+                self._memory.report(dump_name + '.mem-report.json')
+                self._memory.stop()
+                self._memory = None
+
+    def _mem_phase(self, name, banks=None):
+        if self._memory:
+            self._memory.phase(name, banks)
+
+    def _execute_main(self, args, filenames, dump_name):
+
         # default dump type
         if args.dump_type is None:
-            if args.save_lst:
+            if args.save_lst or args.names_crack:
                  #forces all names without making a file
                 args.dump_type = wdumper.TYPE_EMPTY
             elif args.txtp or args.viewer:
@@ -297,8 +330,65 @@ class Cli(object):
             else:
                 # default without other flags
                 args.dump_type = wdumper.TYPE_XSL_SMALLER
-        dumper = wdumper.DumpPrinter(banks, args.dump_type, dump_name)
-        dumper.dump()
+
+        # process banks
+        parser = wparser.Parser()
+        #parser.set_ignore_version(args.ignore_version)
+        parser.set_mmap(args.parse_mmap)
+        parser.set_jobs(args.jobs)
+        parser.set_hirc_jobs(args.jobs_hirc)
+        parser.set_lazy(args.parse_lazy)
+        parser.set_profile(self._get_profile(args))
+        parser.set_unique(args.parse_unique)
+        parser.set_profiler(args.parse_report, dump_name + '.parse-report.json')
+        parser.set_compact(args.parse_arrays)
+        parser.set_indexed(args.parse_index)
+        parser.set_cache(args.parse_cache or args.parse_cache_dir, args.parse_cache_dir)
+
+        # check banks before parsing
+        if args.bank_scan or args.bank_inventory:
+            scanned_filenames = parser.scan_banks(filenames, args.bank_repeat)
+            if args.bank_inventory:
+                wscanner.write_inventory(parser.get_infos(), dump_name + '.inventory.txt')
+                return
+            filenames = scanned_filenames
+
+        names = wnames.Names()
+        names.set_cache(args.parse_cache or args.parse_cache_dir, args.parse_cache_dir)
+
+        # streamed banks are discarded while dumping, so other actions can't use them
+        streamer = None
+        if args.dump_stream:
+            streamer = wdumper.DumpPrinter(None, args.dump_type, dump_name)
+            if not streamer.is_streamable() or args.txtp or args.viewer:
+                logging.info("dump stream ignored (only for txt/xml dumps without txtp/viewer)")
+                streamer = None
+
+        if streamer:
+            # names are needed before parsing
+            names.add_banknames(filenames)
+            names.parse_files([], filenames, lst=args.names_lst, db=args.names_db)
+            parser.set_names(names)
+            parser.set_streamer(streamer)
+
+            streamer.start_stream()
+            parser.parse_banks(filenames)
+            streamer.end_stream()
+            banks = parser.get_banks(args.bank_repeat)
+            self._mem_phase('dump', banks)
+        else:
+            parser.parse_banks(filenames)
+            banks = parser.get_banks(args.bank_repeat)
+            self._mem_phase('parse', banks)
+
+            # load names
+            names.parse_files(banks, parser.get_filenames(), lst=args.names_lst, db=args.names_db)
+            parser.set_names(names)
+            self._mem_phase('names')
+
+            dumper = wdumper.DumpPrinter(banks, args.dump_type, dump_name)
+            dumper.dump()
+            self._mem_phase('dump')
 
         # start viewer
         if args.viewer:
@@ -339,8 +429,10 @@ class Cli(object):
             cleaner.process()
 
         # db manipulation
-        if args.dump_type == wdumper.TYPE_NONE and (args.save_lst or args.save_db):
+        if args.dump_type == wdumper.TYPE_NONE and (args.save_lst or args.save_db or args.names_crack):
             logging.info("dump set to none, may not save all names")
+        if args.names_crack:
+            self._crack(args, names, filenames)
         if args.save_lst:
             names.save_lst(basename=dump_name)
         if args.save_db:
@@ -350,6 +442,33 @@ class Cli(object):
         if args.tests:
             wtests.Tests().main()
 
+    # names for missing IDs, before saving lists (that removes them)
+    def _crack(self, args, names, filenames):
+        cracker = wcracker.Cracker(names)
+        cracker.load_words(args.names_crack)
+        cracker.set_depth(args.names_crack_depth)
+        cracker.set_numbers(args.names_crack_numbers)
+        cracker.set_jobs(args.jobs)
+        results = cracker.crack()
+
+        outname = os.path.join(os.path.dirname(filenames[0]), 'wwnames.txt')
+        cracker.save(results, outname)
+
+    # parts of banks actually used by current actions
+    def _get_profile(self, args):
+        if args.parse_profile:
+            return args.parse_profile
+
+        if args.viewer or args.dump_type not in (wdumper.TYPE_NONE, wdumper.TYPE_EMPTY):
+            return wparser.PROFILE_FULL
+        if args.txtp or args.file_cleaner:
+            if args.save_lst or args.save_db:
+                return wparser.PROFILE_FULL
+            return wparser.PROFILE_TXTP
+        if args.dump_type == wdumper.TYPE_EMPTY:
+            return wparser.PROFILE_NAMES
+        return wparser.PROFILE_FULL
+
     def _generate(self, args, banks, locator, names, tags):
             # generate txtp
         if not args.txtp:
@@ -364,7 +483,10 @@ class Cli(object):
         if args.txtp_lang:
             langs = args.txtp_lang
 
-        for lang in langs:
+        # banks are used again after generating for other langs or by the cleaner
+        low_memory = args.txtp_low_memory and not args.file_cleaner
+
+        for index, lang in enumerate(langs):
             generator = wgenerator.Generator(banks, locator, names)
             generator.set_generate_unused(args.txtp_unused)
             generator.set_filter(args.txtp_filter)
@@ -382,6 +504,7 @@ class Cli(object):
             generator.set_renames(args.txtp_renames)
 
             generator.set_move(args.txtp_move)
+            generator.set_low_memory(low_memory and index == len(langs) - 1)
             generator.set_name_wems(args.txtp_name_wems)
             generator.set_name_vars(args.txtp_name_vars)
             generator.set_bnkskip(args.txtp_bnkskip)
@@ -404,3 +527,4 @@ class Cli(object):
             generator.set_x_prefilter_paths(args.txtp_x_prefilter_paths)
 
             generator.generate()
+            self._mem_phase('generate')
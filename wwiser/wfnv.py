@@ -1,10 +1,19 @@
 import re
 
+# optional, for faster hashing of big name lists
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
 class Fnv(object):
     FNV_DICT = '0123456789abcdefghijklmnopqrstuvwxyz_'
     FNV_FORMAT = re.compile(r"^[a-z_][a-z0-9\_]*$")
     FNV_FORMAT_EX = re.compile(r"^[a-z_0-9][a-z0-9_()\- ,]*$")
 
+    NUMPY_MIN = 256 #less is faster without numpy
+
     def is_hashable(self, lowname):
         return self.FNV_FORMAT.match(lowname)
 
@@ -62,3 +71,49 @@ class Fnv(object):
     def get_hash_lw(self, lowname):
         namebytes = bytes(lowname, 'UTF-8')
         return self._get_hash(namebytes)
+
+    # Hashes many (lowercase) names at once, returning hashes in the same order. With numpy names
+    # of the same length are hashed together as a byte matrix, one column (name position) at a time.
+    def get_hashes_lw(self, lownames):
+        items = [bytes(lowname, 'UTF-8') for lowname in lownames]
+        if numpy is None or len(items) < self.NUMPY_MIN:
+            return self._get_hashes(items)
+        return self._get_hashes_numpy(items)
+
+    def get_hashes(self, names):
+        return self.get_hashes_lw([name.lower() for name in names])
+
+
+    # same as _get_hash but without per-name calls
+    def _get_hashes(self, items):
+        hashes = []
+        for namebytes in items:
+            hash = 2166136261
+            for namebyte in namebytes:
+                hash = ((hash * 16777619) ^ namebyte) & 0xFFFFFFFF
+            hashes.append(hash)
+        return hashes
+
+    def _get_hashes_numpy(self, items):
+        sizes = {}
+        for index, namebytes in enumerate(items):
+            sizes.setdefault(len(namebytes), []).append(index)
+
+        hashes = [0] * len(items)
+        for size, indexes in sizes.items():
+            if len(indexes) < self.NUMPY_MIN:
+                for index, hash in zip(indexes, self._get_hashes([items[index] for index in indexes])):
+                    hashes[index] = hash
+                continue
+
+            data = b''.join([items[index] for index in indexes])
+            matrix = numpy.frombuffer(data, dtype=numpy.uint8).reshape(len(indexes), size)
+            values = numpy.full(len(indexes), 2166136261, dtype=numpy.uint32)
+            prime = numpy.uint32(16777619)
+            for column in range(size):
+                values *= prime #wraps around like the python clamp
+                values ^= matrix[:, column]
+
+            for index, hash in zip(indexes, values.tolist()):
+                hashes[index] = hash
+        return hashes
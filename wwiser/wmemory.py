@@ -0,0 +1,104 @@
+import logging, json, os, tracemalloc
+from .parser import wmodel
+
+
+# Memory used at each step of a run (see --mem-report): current/peak traced memory, memory
+# held per module (where it was allocated, ex. wmodel for bank trees or wnames for names), and
+# node counts per class and bank. Tracing makes everything slower, so it's only for testing.
+
+TOP_MODULES = 15
+
+
+class MemoryReport(object):
+    def __init__(self):
+        self._phases = []
+        self._basedir = os.path.dirname(os.path.abspath(__file__))
+
+    def start(self):
+        tracemalloc.start()
+
+    def stop(self):
+        tracemalloc.stop()
+
+    # snapshot after some step (loaded banks are counted if passed)
+    def phase(self, name, banks=None):
+        if not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+        modules = {}
+        for stat in snapshot.statistics('filename'):
+            module = self._get_module(stat.traceback[0].filename)
+            modules[module] = modules.get(module, 0) + stat.size
+        modules = sorted(modules.items(), key=lambda item: item[1], reverse=True)
+
+        phase = {
+            'name': name,
+            'current': current,
+            'peak': peak,
+            'modules': [{'module': module, 'size': size} for module, size in modules],
+            'banks': [self._get_bank(bank) for bank in banks or []],
+        }
+        self._phases.append(phase)
+        if hasattr(tracemalloc, 'reset_peak'): #python 3.9+
+            tracemalloc.reset_peak()
+
+    def _get_module(self, filename):
+        # wwiser modules as package paths, others (python libs) as-is
+        path = os.path.abspath(filename)
+        if path.startswith(self._basedir):
+            path = os.path.relpath(path, os.path.dirname(self._basedir))
+            return os.path.splitext(path)[0].replace(os.sep, '.')
+        return os.path.basename(filename)
+
+    # node counts without loading lazy parts
+    def _get_bank(self, bank):
+        root = bank.get_root()
+        classes = {}
+        stack = [bank]
+        while stack:
+            node = stack.pop()
+            name = type(node).__name__
+            classes[name] = classes.get(name, 0) + 1
+            if isinstance(node, wmodel.NodeList) and not node.is_loaded():
+                continue
+            children = node.get_loaded_children()
+            if children:
+                stack.extend(children)
+
+        return {
+            'filename': os.path.join(root.get_path(), root.get_filename()),
+            'nodes': sum(classes.values()),
+            'classes': classes,
+        }
+
+    def report(self, outname=None):
+        if not self._phases:
+            return
+
+        mb = 1024.0 * 1024.0
+        logging.info("memory: %-10s %10s %10s  %s", 'phase', 'current', 'peak', 'top modules')
+        for phase in self._phases:
+            modules = ', '.join(['%s %.1fMB' % (item['module'], item['size'] / mb) for item in phase['modules'][0:3]])
+            logging.info("memory: %-10s %8.1fMB %8.1fMB  %s", phase['name'], phase['current'] / mb, phase['peak'] / mb, modules)
+
+        # last phase with banks has final counts
+        banks = None
+        for phase in self._phases:
+            if phase['banks']:
+                banks = phase['banks']
+        if banks:
+            logging.info("memory: %-40s %10s  %s", 'bank', 'nodes', 'classes')
+            for bank in banks:
+                classes = ', '.join(['%s %i' % (name, count) for name, count in sorted(bank['classes'].items())])
+                logging.info("memory: %-40s %10i  %s", bank['filename'], bank['nodes'], classes)
+
+        if not outname:
+            return
+        logging.info("memory: writting %s" % (outname))
+        for phase in self._phases:
+            phase['modules'] = phase['modules'][0:TOP_MODULES]
+        with open(outname, 'w', encoding='utf-8') as outfile:
+            json.dump({'phases': self._phases}, outfile, indent=1)
@@ -1,4 +1,6 @@
+import io, struct
 from .generator.render import bnode_rtpc
+from .parser import wio, wmodel, wparser, wdefs
 
 
 class Tests(object):
@@ -9,6 +11,8 @@ class Tests(object):
         print("tests")
         
         GraphTests().start()
+        RecordTests().start()
+        FieldStoreTests().start()
         pass
 
     def _info(self):
@@ -102,6 +106,127 @@ class GraphTests(object):
             print(" x=%s, y=%s" % (x, y))
         print("")
 
+# bulk records must make the same nodes as reading fields one by one, even with bad data
+class RecordTests(object):
+    VERSION = 134
+
+    def start(self):
+        wparser.setup_version(self.VERSION)
+
+        point = struct.pack('<ffI', 1.0, 2.0, 4)
+        self._test('RTPC graph', point * 3, 3, wparser.parse_rtpc_graph, self._read_graph)
+        self._test('RTPC graph (truncated)', point * 2 + b'\0\0', 5, wparser.parse_rtpc_graph, self._read_graph)
+
+        # split layouts (all ids, then all values)
+        props = struct.pack('<H3H3f', 3, 5, 6, 7, 1.0, 2.0, 3.0)
+        self._test('pProps', props, 0, self._parse_props, self._read_props)
+        self._test('pProps (truncated)', props[:-6], 0, self._parse_props, self._read_props)
+        self._test('pProps (truncated ids)', props[:4], 0, self._parse_props, self._read_props)
+
+        ranged = struct.pack('<B2B4f', 2, 0, 3, 1.0, 2.0, 0.5, 0.75)
+        self._test('pProps ranged', ranged, 0, self._parse_ranged, self._read_ranged)
+        self._test('pProps ranged (truncated)', ranged[:-2], 0, self._parse_ranged, self._read_ranged)
+
+        media = struct.pack('<3I', 0x12345678, 0x10, 0x100) * 3
+        self._test('DIDX', media, len(media), wparser.CAkBankMgr__LoadMediaIndex, self._read_media)
+        self._test('DIDX (truncated)', media[:-4], len(media), wparser.CAkBankMgr__LoadMediaIndex, self._read_media)
+        print("")
+
+    def _get_obj(self, data, count):
+        infile = io.BytesIO(data)
+        infile.name = 'test.bnk'
+        root = wmodel.NodeRoot(wio.FileReader(infile), self.VERSION)
+        obj = root.node('test')
+        obj.omax(len(data))
+        obj.lastval = count
+        return obj
+
+    # parses with records and with the equivalent field by field reads
+    def _test(self, name, data, count, parse, read):
+        objs = []
+        for function in (parse, read):
+            obj = self._get_obj(data, count)
+            try:
+                function(obj)
+            except wmodel.ParseError as e:
+                obj.add_error(str(e))
+            objs.append(obj)
+
+        ok = _get_lines(objs[0]) == _get_lines(objs[1])
+        print("- %s: %s" % (name, 'ok' if ok else 'different'))
+
+    def _read_graph(self, obj):
+        for elem in obj.list('pRTPCMgr', 'AkRTPCGraphPoint', obj.lastval):
+            elem.f32('From')
+            elem.f32('To')
+            elem.U32('Interp').fmt(wdefs.AkCurveInterpolation)
+
+    def _parse_props(self, obj):
+        wparser.AkPropBundle_float_unsigned_short___SetInitialParams(obj, None)
+
+    def _read_props(self, obj):
+        obj = obj.node('AkPropBundle<float,unsigned short>')
+        obj.u16('cProps')
+        elems = obj.list('pProps', 'AkPropBundle', obj.lastval).preload()
+        for elem in elems:
+            elem.U16('pID').fmt(wdefs.AkRTPC_ParameterID)
+        for elem in elems:
+            elem.f32('pValue')
+
+    def _parse_ranged(self, obj):
+        wparser.AkPropBundle_RANGED_MODIFIERS_AkPropValue__unsigned_char___SetInitialParams(obj, None)
+
+    def _read_ranged(self, obj):
+        obj = obj.node('AkPropBundle<RANGED_MODIFIERS<AkPropValue>>')
+        obj.u8i('cProps')
+        elems = obj.list('pProps', 'AkPropBundle', obj.lastval).preload()
+        for elem in elems:
+            elem.U8x('pID').fmt(wdefs.AkPropID)
+        for elem in elems:
+            elem.uni('min')
+            elem.uni('max')
+
+    def _read_media(self, obj):
+        obj.set_name('MediaIndex')
+        for elem in obj.list('pLoadedMedia', 'MediaHeader', obj.lastval // 0x0c):
+            elem.sid('id').fnv(wdefs.fnv_no)
+            elem.U32('uOffset')
+            elem.U32('uSize')
+
+# compact fields must read back the same (names and types are interned separately)
+class FieldStoreTests(object):
+    VERSION = 134
+    NAMES = 300
+
+    def start(self):
+        data = struct.pack('<%iI' % (self.NAMES), *range(self.NAMES)) + struct.pack('<f', 1.0)
+        infile = io.BytesIO(data)
+        infile.name = 'test.bnk'
+        root = wmodel.NodeRoot(wio.FileReader(infile), self.VERSION)
+        obj = root.node('test')
+        for i in range(self.NAMES):
+            obj.u32('field%03i' % (i))
+        obj.f32('value')
+
+        lines1 = _get_lines(obj)
+        try:
+            root.compact()
+            lines2 = _get_lines(obj)
+        except OverflowError as e:
+            lines2 = str(e)
+        store = root.get_fields()
+        ok = lines1 == lines2 and len(store.offsets) == len(store.types) == len(store.names) == self.NAMES + 1
+        print("- FieldStore (%i names): %s" % (self.NAMES, 'ok' if ok else 'different'))
+        print("")
+
+def _get_lines(node, lines=None, depth=0):
+    if lines is None:
+        lines = []
+    lines.append((depth, node.get_nodename(), list(node.get_attr_items())))
+    for child in node.get_children() or []:
+        _get_lines(child, lines, depth + 1)
+    return lines
+
 class GraphTest(object):
     def __init__(self, name, version, scaling, points, values):
         self.name = name